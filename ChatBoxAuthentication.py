@@ -9,8 +9,6 @@ import streamlit as st
 import json
 import tempfile
 import os
-from google import genai
-from google.genai import types
 
 # --- STEP 1: Authentication setup ---
 # Robust session state initialization
@@ -55,6 +53,10 @@ st.title("🛍️ Gemini Return Policy Chatbot")
 st.button("🚪 Logout", on_click=logout)
 
 # --- Google Gemini Setup ---
+# Imported only once logged in, so the login screen never loads the SDK
+from google import genai
+from google.genai import types
+
 # Load Google Service Account from secrets
 service_account_info = dict(st.secrets["google_service_account"])
 
@@ -8,6 +8,11 @@ import streamlit as st
 import json
 import tempfile
 import os
+
+# --- App title ---
+# Drawn before the Gemini SDK is imported, so the page paints while it loads
+st.title("🛍️ Gemini Return Policy Chatbot")
+
 from google import genai
 from google.genai import types
 
@@ -32,9 +37,6 @@ client = genai.Client(
 )
 
 
-# --- App title ---
-st.title("🛍️ Gemini Return Policy Chatbot")
-
 # --- Session state to track conversation ---
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = [
@@ -6,10 +6,11 @@ Created on Sat Jul 26 15:58:54 2025
 """
 
 import streamlit as st
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder, OrdinalEncoder
-from sklearn.ensemble import GradientBoostingClassifier
+
+from cache_inspector import cached_data, cached_resource, render_cache_inspector
+from mushroom_batch import batch_prediction_ui
+from mushroom_training import BackgroundTrainer
 
 URL = "https://raw.githubusercontent.com/marcopeix/MachineLearningModelDeploymentwithStreamlit/master/17_caching_capstone/data/mushrooms.csv"
 COLS = ['class', 'odor', 'gill-size', 'gill-color', 'stalk-surface-above-ring',
@@ -18,51 +19,20 @@ COLS = ['class', 'odor', 'gill-size', 'gill-color', 'stalk-surface-above-ring',
  
 path=f'data/mushrooms.csv'
 
-@st.cache_data(show_spinner="Fetching data...")
-def read_data(path, cols):
-    df = pd.read_csv(path)
-    df = df[cols]
-
-    return df
-
-@st.cache_resource
-def get_target_encoder(data):
-    le = LabelEncoder()
-    le.fit(data['class'])
-
-    return le
-
-@st.cache_resource
-def get_features_encoder(data):
-    oe = OrdinalEncoder()
-    X_cols = data.columns[1:]
-    oe.fit(data[X_cols])
-
-    return oe
-
-@st.cache_data(show_spinner="Encoding data...")
-def encode_data(data, _X_encoder, _y_encoder):
-    data['class'] = _y_encoder.transform(data['class'])
-
-    X_cols = data.columns[1:]
-    data[X_cols] = _X_encoder.transform(data[X_cols])
+# Hyperparameters are part of the artifact key: changing them triggers a retrain
+GBC_PARAMS = {"max_depth": 5, "random_state": 42}
 
-    return data
+# One trainer per server process: fits run in a worker process and the
+# finished model is swapped in; sessions never wait on a fit
+@cached_resource
+def get_trainer():
+    return BackgroundTrainer()
 
-@st.cache_resource(show_spinner="Training model...")
-def train_model(data):
-    X = data.drop(['class'], axis=1)
-    y = data['class']
 
-    gbc = GradientBoostingClassifier(max_depth=5, random_state=42)
-
-    gbc.fit(X, y)
-
-    return gbc
-
-
-@st.cache_data(show_spinner="Making a prediction...")
-def make_prediction(_model, _X_encoder, X_pred):
+# model_key is part of the cache key so a swapped-in model never serves
+# predictions cached for the previous one
+@cached_data(show_spinner="Making a prediction...")
+def make_prediction(_model, _X_encoder, X_pred, model_key=None):
 
     features = [each[0] for each in X_pred]
     features = np.array(features).reshape(1,-1)
@@ -75,8 +45,6 @@ def make_prediction(_model, _X_encoder, X_pred):
 if __name__ == "__main__":
     st.title("Mushroom classifier 🍄")
     
-    df = read_data(path, COLS)
-    
     st.subheader("Step 1: Select the values for prediction")
 
     col1, col2, col3 = st.columns(3)
@@ -99,12 +67,31 @@ if __name__ == "__main__":
     pred_btn = st.button("Predict", type="primary")
 
     if pred_btn:
-        le = get_target_encoder(df)
-        oe = get_features_encoder(df)
-
-        encoded_df = encode_data(df, oe, le)
-
-        gbc = train_model(encoded_df)
+        trainer = get_trainer()
+        try:
+            model_key, bundle, is_current = trainer.get(path, COLS, GBC_PARAMS)
+        except OSError as e:
+            st.error(f"❌ Could not read the training data `{path}`. {e}")
+            st.stop()
+        failure = None if is_current else trainer.failure(path, COLS, GBC_PARAMS)
+
+        if bundle is None and failure is not None:
+            error, retry_in = failure
+            st.error(f"❌ Training the model failed: {error}. Retrying in {retry_in:.0f} s.")
+            st.stop()
+        elif bundle is None:
+            # No model has ever been trained: reject fast instead of blocking
+            done = max(trainer.progress().values(), default=0.0)
+            st.warning("⏳ The model is still training. Please try again in a moment.")
+            st.progress(done, text=f"Training model... {done:.0%}")
+            st.stop()
+        elif failure is not None:
+            st.warning(f"Training the new model failed ({failure[0]}); serving the previous model.")
+        elif not is_current:
+            st.caption("Serving the previous model while the new one trains in the background.")
+
+        oe = bundle["features_encoder"]
+        gbc = bundle["model"]
 
         x_pred = [odor, 
                   gill_size, 
@@ -116,9 +103,32 @@ if __name__ == "__main__":
                   ring_type, 
                   spore_print_color]
         
-        pred = make_prediction(gbc, oe, x_pred)
+        pred = make_prediction(gbc, oe, x_pred, model_key)
 
         nice_pred = "The mushroom is poisonous 🤢" if pred == 1 else "The mushroom is edible 🍴"
 
         st.write(nice_pred)
 
+        # Where the last fit spent its time: fingerprinting vs each stage
+        if bundle.get("timings"):
+            with st.expander("Training timings (seconds)"):
+                st.json({stage: round(seconds, 4) for stage, seconds in bundle["timings"].items()})
+
+    # Many specimens at once, predicted in chunks with the current model
+    def load_predictor():
+        trainer = get_trainer()
+        model_key, bundle, _ = trainer.get(path, COLS, GBC_PARAMS)
+        if bundle is None:
+            failure = trainer.failure(path, COLS, GBC_PARAMS)
+            if failure is not None:
+                raise RuntimeError(f"Training the model failed: {failure[0]}")
+            return None
+        le, oe, gbc = bundle["target_encoder"], bundle["features_encoder"], bundle["model"]
+        return (lambda X: le.inverse_transform(gbc.predict(oe.transform(X)))), oe, model_key
+
+    batch_prediction_ui(load_predictor)
+
+    # Hits/misses, entries, bytes and time saved for every cached function;
+    # only shown to whoever started the server with CACHE_INSPECTOR=1
+    render_cache_inspector()
+
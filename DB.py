@@ -1,58 +1,188 @@
 import streamlit as st
-import pandas as pd
-from supabase import create_client, Client
+
+from cache_inspector import cached_resource
+
+# pandas and supabase are imported on the branches that use them, so the
+# first render (before connecting) loads neither
 
 # ---------------------------
 # Session State Setup
 # ---------------------------
 if "connected" not in st.session_state:
     st.session_state.connected = False
-if "supabase" not in st.session_state:
-    st.session_state.supabase = None
+if "source" not in st.session_state:
+    st.session_state.source = None
+if "mirror" not in st.session_state:
+    st.session_state.mirror = None
 if "show_data" not in st.session_state:
     st.session_state.show_data = False
 if "data" not in st.session_state:
     st.session_state.data = None
+if "filtered" not in st.session_state:
+    st.session_state.filtered = None
+if "index" not in st.session_state:
+    st.session_state.index = None
+if "rollups" not in st.session_state:
+    st.session_state.rollups = None
 
 # ---------------------------
-# Connect Function
+# Data Sources
 # ---------------------------
-def connect_to_db():
+# Supabase, or the CSV sample in a local SQLite database for offline use.
+# Both take the same filters, so the dashboard can push them down.
+SOURCES = ("Supabase", "Local SQLite (offline)")
+
+# One client pool per server process: sessions borrow a Supabase client
+# per query instead of each creating (and discarding) their own
+POOL_SIZE = 8
+
+@cached_resource
+def get_supabase_pool():
+    from supabase_pool import SupabasePool
+
     url: str = st.secrets['supbase']['supabase_url']
     key: str = st.secrets['supbase']['supabase_key']
-    client: Client = create_client(url, key)
-    st.session_state.supabase = client
+    return SupabasePool(url, key, size=POOL_SIZE)
+
+# One local database per server process, shared by every session
+@cached_resource(show_spinner="Loading local database...")
+def get_local_source():
+    from car_parts_data import SQLiteSource
+
+    return SQLiteSource()
+
+# Local Parquet mirror of the table per source, shared by every session:
+# reloads fetch only rows added since the last sync (see car_parts_data.py)
+@cached_resource
+def get_mirror(source_name):
+    import os
+    from car_parts_data import MIRROR_DIR, SupabaseSource, TableMirror
+
+    if source_name == "Supabase":
+        source, file_name = SupabaseSource(get_supabase_pool()), "car_parts_monthly_sales.supabase.parquet"
+    else:
+        source, file_name = get_local_source(), "car_parts_monthly_sales.local.parquet"
+    return TableMirror(source, os.path.join(MIRROR_DIR, file_name))
+
+# ---------------------------
+# Connect Function
+# ---------------------------
+def connect_to_db(source_name):
+    if source_name == "Supabase":
+        # Borrowing once creates the first client, so bad credentials show up here
+        with get_supabase_pool().borrow():
+            pass
+    mirror = get_mirror(source_name)
+    st.session_state.mirror = mirror
+    st.session_state.source = mirror.source
     st.session_state.connected = True
-    st.success("✅ Connected to Supabase")
+    st.success("✅ Connected to Supabase" if source_name == "Supabase" else "✅ Connected to the local database")
 
 # ---------------------------
 # Disconnect Function
 # ---------------------------
 def disconnect_db():
-    st.session_state.supabase = None
+    st.session_state.source = None
+    st.session_state.mirror = None
     st.session_state.connected = False
     st.session_state.show_data = False
     st.session_state.data = None
-    st.success("🔌 Disconnected from Supabase")
+    st.session_state.filtered = None
+    st.session_state.index = None
+    st.session_state.rollups = None
+    st.success("🔌 Disconnected")
 
 # ---------------------------
 # Query Function
 # ---------------------------
-def run_query():
-    response = st.session_state.supabase.table('car_parts_monthly_sales').select("*").execute()
-    return pd.json_normalize(response.data)
+# Streams the table page by page (see car_parts_data.py) instead of one
+# select("*"), showing progress and the first rows while the rest loads
+PAGE_SIZE = 1000
+PREVIEW_ROWS = 100
+
+def _load_with_progress(load):
+    progress = st.progress(0.0, text="Loading data...")
+    preview = st.empty()
+
+    def on_page(buffer, total):
+        done = buffer.size / total if total else 1.0
+        progress.progress(min(done, 1.0), text=f"Loaded {buffer.size:,} of {total or buffer.size:,} rows")
+        if buffer.size <= PAGE_SIZE:
+            preview.dataframe(buffer.to_frame(stop=PREVIEW_ROWS))
+
+    df = load(on_page)
+    progress.empty()
+    preview.empty()
+    return df
+
+# Results get the same dtypes as the mirror: parsed dates, categorical
+# parts_id, downcast numbers (see normalize_frame in car_parts_data.py)
+def run_query(columns=None, filters=()):
+    from car_parts_data import normalize_frame
+
+    source = st.session_state.source
+    df = _load_with_progress(lambda on_page: source.load(columns, filters, page_size=PAGE_SIZE, on_page=on_page))
+    return normalize_frame(df)
+
+# Whole table from the shared mirror; full=True refetches every row. The
+# mirrored frame, its index and its rollups are shared by all sessions, so
+# they are only ever read. The session keeps the index of the frame it
+# loaded, which stays row-aligned with its data even after another session
+# syncs, and the volume rollups of that frame.
+def load_data(columns, full=False):
+    mirror = st.session_state.mirror
+    if full:
+        df = _load_with_progress(lambda on_page: mirror.sync(full=True, on_page=on_page))
+    else:
+        df = _load_with_progress(lambda on_page: mirror.get(on_page=on_page))
+    st.session_state.index = mirror.index(df)
+    st.session_state.rollups = mirror.rollups(df)
+    return df if list(columns) == list(df.columns) else df[list(columns)]
+
+# ---------------------------
+# Windowed Table
+# ---------------------------
+# Sends the browser one page of rows plus summary stats (row count and
+# per-column min / max / distinct) instead of the whole frame, so payload
+# size and rerun time don't grow with the table. Summaries are computed
+# once per (table, version) and kept in the session.
+PAGE_SIZES = (25, 50, 100, 250, 500)
+
+def windowed_table(df, key, version, index=None):
+    from car_parts_data import summarize
+
+    summaries = st.session_state.setdefault("summaries", {})
+    if summaries.get(key, (None,))[0] != version:
+        summaries[key] = (version, summarize(df, index))
+    n_rows, stats = summaries[key][1]
+
+    with st.expander(f"{n_rows:,} rows · column summary"):
+        st.dataframe(stats, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=2, key=f"{key}_page_size")
+    n_pages = max(1, -(-n_rows // page_size))
+    with col2:
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size])
+    st.caption(f"Rows {min(start + 1, n_rows):,}–{min(start + page_size, n_rows):,} of {n_rows:,}")
 
 # ---------------------------
 # UI Layout
 # ---------------------------
 st.title("📦 Car Parts Dashboard")
 
+source_name = st.radio("Data source", SOURCES, horizontal=True, disabled=st.session_state.connected)
+
 # Connect/Disconnect buttons
 col1, col2 = st.columns(2)
 with col1:
     if not st.session_state.connected:
         if st.button("🔗 Connect to Database"):
-            connect_to_db()
+            connect_to_db(source_name)
 with col2:
     if st.session_state.connected:
         if st.button("🔌 Disconnect"):
@@ -60,51 +190,159 @@ with col2:
 
 # Reload / Clear buttons
 if st.session_state.connected:
-    col3, col4 = st.columns(2)
+    from car_parts_data import COLUMNS
+
+    # Columns kept in this session (and requested by database filters)
+    load_columns = st.multiselect("Columns to load", COLUMNS, default=COLUMNS)
+
+    col3, col4, col5 = st.columns(3)
     with col3:
-        if st.button("🔄 Reload Data"):
-            st.session_state.data = run_query()
+        if st.button("🔄 Reload Data", disabled=not load_columns):
+            st.session_state.data = load_data(load_columns)
+            st.session_state.filtered = None
             st.session_state.show_data = True
     with col4:
+        if st.button("♻️ Full Resync", disabled=not load_columns,
+                     help="Refetch every row, picking up updated and deleted rows too"):
+            st.session_state.data = load_data(load_columns, full=True)
+            st.session_state.filtered = None
+            st.session_state.show_data = True
+    with col5:
         if st.button("🧹 Clear Output"):
             st.session_state.show_data = False
 
+    mirror = st.session_state.mirror
+    if mirror.last_sync is not None:
+        sync = mirror.last_sync
+        st.caption(f"Local mirror: {sync['rows']:,} rows. Last sync ({sync['mode']}) fetched "
+                   f"{sync['rows_fetched']:,} rows in {sync['seconds']:.2f} s.")
+        if sync["memory"] is not None:
+            before, after = sync["memory"]["before"], sync["memory"]["after"]
+            with st.expander(f"Memory: {before['total'] / 1024:,.0f} KB as loaded, "
+                             f"{after['total'] / 1024:,.0f} KB normalized"):
+                st.dataframe({"column": list(before), "as loaded (bytes)": list(before.values()),
+                              "normalized (bytes)": [after[col] for col in before]}, hide_index=True)
+
 # ---------------------------
 # Show and Filter Data
 # ---------------------------
 if st.session_state.connected and st.session_state.show_data and st.session_state.data is not None:
+    import time
+    import pandas as pd
+
     df = st.session_state.data
+    # Built once per load (see FrameIndex in car_parts_data.py): sorted
+    # columns for ranges, row positions per value for categoricals
+    index = st.session_state.index
 
-    # Display raw data preview
+    # Display raw data preview, one page at a time
     st.subheader("📄 Raw Data")
-    st.dataframe(df)
+    windowed_table(df, "raw", id(df), index)
 
     # Column selector for filtering
     st.subheader("🔍 Filter Data")
-    filter_col = st.selectbox("Choose a column to filter by:", df.columns)
-
-    # Dynamic filter based on data type
-    if pd.api.types.is_numeric_dtype(df[filter_col]):
-        min_val = float(df[filter_col].min())
-        max_val = float(df[filter_col].max())
-        selected_range = st.slider(f"Select range for {filter_col}", min_val, max_val, (min_val, max_val))
-        filtered_df = df[(df[filter_col] >= selected_range[0]) & (df[filter_col] <= selected_range[1])]
-
-    elif pd.api.types.is_datetime64_any_dtype(df[filter_col]):
-        min_date = df[filter_col].min()
-        max_date = df[filter_col].max()
-        selected_dates = st.date_input(f"Select date range for {filter_col}", [min_date, max_date])
-        if len(selected_dates) == 2:
-            filtered_df = df[(df[filter_col] >= pd.to_datetime(selected_dates[0])) &
-                             (df[filter_col] <= pd.to_datetime(selected_dates[1]))]
-        else:
-            filtered_df = df
-
-    else:  # Assume categorical
-        unique_vals = df[filter_col].dropna().unique()
-        selected_vals = st.multiselect(f"Select values for {filter_col}", unique_vals, default=list(unique_vals))
-        filtered_df = df[df[filter_col].isin(selected_vals)]
-
-    # Display filtered data
+    filter_cols = st.multiselect("Choose columns to filter by:", df.columns, default=list(df.columns[:1]))
+
+    # With pushdown the filters run in the database and only the matching
+    # rows are transferred (except Supabase date filters, see SupabaseSource);
+    # otherwise they are applied to df here, through the index
+    pushdown = st.checkbox("Filter in the database", value=False,
+                           help="Send the filters to the data source instead of filtering the loaded rows")
+
+    # Dynamic filter per column based on data type, expressed as data source
+    # filters (see car_parts_data.py). A selection that keeps every row adds
+    # none; filters on several columns must all match.
+    filters = []
+    for filter_col in filter_cols:
+        if pd.api.types.is_numeric_dtype(df[filter_col]):
+            low, high = index.bounds(filter_col)
+            min_val, max_val = float(low), float(high)
+            selected_range = st.slider(f"Select range for {filter_col}", min_val, max_val, (min_val, max_val))
+            if selected_range != (min_val, max_val):
+                filters.append((filter_col, "between", selected_range))
+
+        elif pd.api.types.is_datetime64_any_dtype(df[filter_col]):
+            low, high = index.bounds(filter_col)
+            min_date, max_date = pd.Timestamp(low).date(), pd.Timestamp(high).date()
+            selected_dates = st.date_input(f"Select date range for {filter_col}", [min_date, max_date])
+            if len(selected_dates) == 2 and tuple(selected_dates) != (min_date, max_date):
+                filters.append((filter_col, "between", tuple(selected_dates)))
+
+        else:  # Assume categorical
+            unique_vals = index.distinct(filter_col)
+            selected_vals = st.multiselect(f"Select values for {filter_col}", unique_vals, default=list(unique_vals))
+            # Whichever list is shorter is sent
+            selected = set(selected_vals)
+            excluded = [v for v in unique_vals if v not in selected]
+            if excluded:
+                filters.append((filter_col, "in", selected_vals) if len(selected_vals) <= len(excluded)
+                               else (filter_col, "not_in", excluded))
+
+    if not filters:
+        filtered_df = df
+    elif pushdown:
+        # Re-queried only when the filters change
+        query_key = (tuple(df.columns), repr(filters))
+        if st.session_state.filtered is None or st.session_state.filtered[0] != query_key:
+            st.session_state.filtered = (query_key, run_query(list(df.columns), filters))
+        filtered_df = st.session_state.filtered[1]
+    else:
+        started = time.perf_counter()
+        filtered_df = index.filter(filters, df)
+        st.caption(f"Filtered {len(df):,} rows to {len(filtered_df):,} in "
+                   f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Display filtered data, one page at a time
     st.subheader("📊 Filtered Data")
-    st.dataframe(filtered_df)
+    windowed_table(filtered_df, "filtered", (id(df), repr(filters), pushdown))
+
+    # Encoded chunk by chunk into a temporary file, and only when the button
+    # is clicked (see Export in car_parts_data.py). Streamlit then holds the
+    # finished file in memory to serve it. With pushdown the query is rerun
+    # in the database and streamed page by page instead.
+    st.subheader("📤 Export")
+    from functools import partial
+    from car_parts_data import EXPORT_FORMATS, export_file, frame_chunks
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+    with col2:
+        export_columns = st.multiselect("Columns to export", list(df.columns), default=list(df.columns))
+    extension, mime = EXPORT_FORMATS[export_format]
+
+    if pushdown and filters:
+        make_chunks = partial(st.session_state.source.iter_chunks, export_columns, filters)
+    else:
+        make_chunks = partial(frame_chunks, filtered_df, export_columns)
+    st.download_button(f"⬇️ Download {len(filtered_df):,} rows as {export_format}",
+                       lambda make_chunks=make_chunks, fmt=export_format: export_file(make_chunks(), fmt),
+                       file_name=f"car_parts.{extension}", mime=mime, disabled=not export_columns)
+
+    # Charts read the pre-aggregated rollups (see Rollups in
+    # car_parts_data.py), not the rows, so they cover the whole table
+    # whatever the filters and loaded columns
+    st.subheader("📈 Volume Trends")
+    rollups = st.session_state.rollups
+    period = st.radio("Period", ("Month", "Year"), horizontal=True)
+    chart_parts = st.multiselect("Parts to chart", rollups.parts.tolist(), default=rollups.top_parts(5).tolist(),
+                                 help="The 5 parts with the highest total volume by default")
+
+    if period == "Month":
+        st.caption("Total volume per month")
+        st.line_chart(rollups.monthly_totals())
+        if chart_parts:
+            st.caption("Volume per month by part")
+            st.line_chart(rollups.part_month(chart_parts).rename(columns=str))
+    else:
+        st.caption("Total volume per year")
+        st.bar_chart(rollups.yearly_totals().rename(index=str))
+        if chart_parts:
+            st.caption("Volume per year by part")
+            st.bar_chart(rollups.part_year(chart_parts).rename(index=str, columns=str))
+
+# Shared connection pool metrics
+pool = getattr(st.session_state.source, "pool", None)
+if pool is not None:
+    with st.sidebar.expander("Connection pool"):
+        st.json(pool.stats())
@@ -9,39 +9,38 @@ Created on Wed Jul 23 21:09:22 2025
 # 📦 Imports
 # =====================
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime
-
-# =====================
-
-df_csv = pd.read_csv("data/quarterly_canada_population.csv")
 
+from cache_inspector import cached_resource, render_cache_inspector
+from population_data import PopulationLoader
+from population_charts import RenderCache, render_figure, plot_downsampled
 
+# =====================
 # 🔗 Load Dataset
 # =====================
-# Public dataset URL from GitHub
-URL = "https://raw.githubusercontent.com/marcopeix/MachineLearningModelDeploymentwithStreamlit/master/12_dashboard_capstone/data/quarterly_canada_population.csv"
-
-# Load data with correct dtypes for better memory performance
-df = pd.read_csv(URL, dtype={
-    'Quarter': str, 
-    'Canada': np.int32,
-    'Newfoundland and Labrador': np.int32,
-    'Prince Edward Island': np.int32,
-    'Nova Scotia': np.int32,
-    'New Brunswick': np.int32,
-    'Quebec': np.int32,
-    'Ontario': np.int32,
-    'Manitoba': np.int32,
-    'Saskatchewan': np.int32,
-    'Alberta': np.int32,
-    'British Columbia': np.int32,
-    'Yukon': np.int32,
-    'Northwest Territories': np.int32,
-    'Nunavut': np.int32
-})
+# One loader per server process: serves the local/cached snapshot right away
+# and revalidates against the GitHub URL in the background (ETag/Last-Modified)
+@cached_resource
+def get_population_loader():
+    return PopulationLoader()
+
+# df and its quarter index are swapped together when the data refreshes
+population_loader = get_population_loader()
+snapshot = population_loader.snapshot()
+df = snapshot.df
+quarter_index = snapshot.quarters
+change_cube = snapshot.changes
+
+# Rendered chart bytes shared by every session (LRU, 32 MB budget)
+@cached_resource
+def get_render_cache():
+    return RenderCache(max_entries=256, max_bytes=32 * 1024 * 1024)
+
+render_cache = get_render_cache()
+
+# Max points drawn per series; longer ranges are downsampled with LTTB
+# ("minmax" is cheaper and keeps every peak). None draws every point.
+MAX_CHART_POINTS = 500
+DOWNSAMPLE_METHOD = "lttb"
 
 # =====================
 # 🧾 Page Title & Info
@@ -90,22 +89,9 @@ end_date = f"{end_quarter} {end_year}"
 # 🧠 Helper Functions
 # =====================
 
-# Converts date string like 'Q3 2020' to a float like 2020.50 for comparison
-def format_date_for_comparison(date_str):
-    quarter, year = date_str.split()
-    year = float(year)
-    if quarter == "Q1":
-        return year
-    elif quarter == "Q2":
-        return year + 0.25
-    elif quarter == "Q3":
-        return year + 0.50
-    elif quarter == "Q4":
-        return year + 0.75
-
-# Checks if end date is before start date
+# Checks if end date is before start date (O(1) lookup in the quarter index)
 def end_before_start(start, end):
-    return format_date_for_comparison(start) > format_date_for_comparison(end)
+    return quarter_index.end_before_start(start, end)
 
 # Displays dashboard with analysis tabs
 def display_dashboard(start_date, end_date, target):
@@ -118,55 +104,68 @@ def display_dashboard(start_date, end_date, target):
 
         # Left column: Metrics
         col1, col2 = st.columns(2)
+        # Rows for the selected range, shared by both tabs
+        filtered_df = df.iloc[quarter_index.slice(start_date, end_date)]
+
         with col1:
-            initial = df.loc[df['Quarter'] == start_date, target].item()
-            final = df.loc[df['Quarter'] == end_date, target].item()
+            change = change_cube.change(target, start_date, end_date)
 
             # Calculate change percentage
-            percentage_diff = round((final - initial) / initial * 100, 2)
+            percentage_diff = round(change["percent"], 2)
             delta = f"{percentage_diff}%"
 
             # Show metrics
-            st.metric(label=start_date, value=initial)
-            st.metric(label=end_date, value=final, delta=delta)
+            st.metric(label=start_date, value=int(change["initial"]))
+            st.metric(label=end_date, value=int(change["final"]), delta=delta)
 
         # Right column: Line chart
         with col2:
-            start_idx = df[df['Quarter'] == start_date].index.item()
-            end_idx = df[df['Quarter'] == end_date].index.item()
-            filtered_df = df.iloc[start_idx:end_idx+1]
-
-            fig, ax = plt.subplots()
-            ax.plot(filtered_df['Quarter'], filtered_df[target], marker='o', color='tab:blue')
-            ax.set_xlabel('Time')
-            ax.set_ylabel('Population')
-            ax.set_title(f"{target} Population Over Time")
-            ax.set_xticks([filtered_df['Quarter'].iloc[0], filtered_df['Quarter'].iloc[-1]])
-            fig.autofmt_xdate()
-            st.pyplot(fig)
+            def draw_change(fig, ax):
+                plot_downsampled(ax, filtered_df[target], MAX_CHART_POINTS, DOWNSAMPLE_METHOD,
+                                 marker='o', color='tab:blue')
+                ax.set_xlabel('Time')
+                ax.set_ylabel('Population')
+                ax.set_title(f"{target} Population Over Time")
+                ax.set_xticks([0, len(filtered_df) - 1],
+                              [filtered_df['Quarter'].iloc[0], filtered_df['Quarter'].iloc[-1]])
+                fig.autofmt_xdate()
+
+            # Repeat views are served from cached bytes without touching matplotlib
+            key = ("change", snapshot.version, target, start_date, end_date,
+                   MAX_CHART_POINTS, DOWNSAMPLE_METHOD)
+            st.image(render_cache.get_or_render(key, lambda: render_figure(draw_change)))
 
     # ========== Tab 2: Compare ==========
     with tab2:
         st.subheader(f"Compare {target} with other regions")
         all_targets = st.multiselect("Choose provinces/territories to compare", options=df.columns[1:], default=[target])
 
-        fig, ax = plt.subplots()
-        for region in all_targets:
-            ax.plot(filtered_df['Quarter'], filtered_df[region], label=region)
-        ax.set_xlabel("Time")
-        ax.set_ylabel("Population")
-        ax.set_title("Regional Population Trends")
-        ax.set_xticks([filtered_df['Quarter'].iloc[0], filtered_df['Quarter'].iloc[-1]])
-        ax.legend()
-        fig.autofmt_xdate()
-        st.pyplot(fig)
+        def draw_compare(fig, ax):
+            for region in all_targets:
+                plot_downsampled(ax, filtered_df[region], MAX_CHART_POINTS, DOWNSAMPLE_METHOD,
+                                 label=region)
+            ax.set_xlabel("Time")
+            ax.set_ylabel("Population")
+            ax.set_title("Regional Population Trends")
+            ax.set_xticks([0, len(filtered_df) - 1],
+                          [filtered_df['Quarter'].iloc[0], filtered_df['Quarter'].iloc[-1]])
+            ax.legend()
+            fig.autofmt_xdate()
+
+        key = ("compare", snapshot.version, start_date, end_date, tuple(all_targets),
+               MAX_CHART_POINTS, DOWNSAMPLE_METHOD)
+        st.image(render_cache.get_or_render(key, lambda: render_figure(draw_compare)))
+
+        # Change over the same range for every selected region, one vectorized pass
+        if all_targets:
+            st.dataframe(change_cube.table(start_date, end_date, all_targets).round(2))
 
 # =====================
 # 🚦 Control Flow
 # =====================
 # After form submission
 if submit_btn:
-    if start_date not in df['Quarter'].tolist() or end_date not in df['Quarter'].tolist():
+    if start_date not in quarter_index or end_date not in quarter_index:
         st.error("❌ Invalid selection. No data found for the chosen quarter and year.")
     elif end_before_start(start_date, end_date):
         st.error("⚠️ End date must come **after** start date.")
@@ -178,9 +177,7 @@ if submit_btn:
         st.session_state["target"] = target
 
         # Get filtered range of rows for selected quarters
-        start_idx = df[df['Quarter'] == start_date].index.item()
-        end_idx = df[df['Quarter'] == end_date].index.item()
-        st.session_state["filtered_df"] = df.iloc[start_idx:end_idx+1]
+        st.session_state["filtered_df"] = df.iloc[quarter_index.slice(start_date, end_date)]
 
 # Only show dashboard if form has been submitted
 if st.session_state.get("form_submitted", False):
@@ -195,3 +192,7 @@ with st.container():
         st.session_state.clear()
         st.rerun()
 
+# Hits/misses, entries, bytes and time saved for every cached function;
+# only shown to whoever started the server with CACHE_INSPECTOR=1
+render_cache_inspector()
+
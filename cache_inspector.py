@@ -0,0 +1,305 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from disk_cache import DiskCache, SHARED_CACHE_DIR
+
+# =====================
+# 🔍 Cache Inspector
+# =====================
+# Drop-in replacements for st.cache_data / st.cache_resource that
+#   - apply ttl / max_entries / max_bytes from cache_policies.yaml, so every
+#     cached function's limits live in one shared file, and
+#   - record hits, misses, compute time and (estimated) entries and bytes
+#     per function, for cache_report() / render_cache_inspector().
+#
+# Streamlit does not report what its caches hold, so entries and bytes are
+# estimated from the misses still inside ttl and max_entries. A max_bytes
+# budget is enforced on that estimate: once it goes over, the least recently
+# used entries are cleared one by one (clear(*args) with the arguments they
+# were computed from) until it fits again.
+#
+# cached_data functions with `shared: true` in their policy also get a
+# persistent tier: an in-memory miss first looks in the on-disk DiskCache
+# shared by every server process on the host, and only computes (under a
+# per-key lock, so concurrent workers compute it once) if that misses too.
+# Each function gets its own directory, held to the same ttl, max_entries
+# and max_bytes as its in-memory cache.
+POLICY_PATH = "cache_policies.yaml"
+
+_policies = {"mtime": None, "config": {}}
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def load_policies(path=POLICY_PATH):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    if _policies["mtime"] != mtime:
+        import yaml
+
+        with open(path) as file:
+            _policies["config"] = yaml.safe_load(file) or {}
+        _policies["mtime"] = mtime
+    return _policies["config"]
+
+
+def policy_for(name, path=POLICY_PATH):
+    config = load_policies(path)
+    policy = {"ttl": None, "max_entries": None, "max_bytes": None, "shared": False}
+    policy.update(config.get("default") or {})
+    policy.update((config.get("functions") or {}).get(name) or {})
+    return policy
+
+
+# cache_data pickles every value anyway, so its pickled length is what the
+# cache holds. Resources are live objects: frames and arrays report their
+# buffers, anything else its __sizeof__ (which our own classes override).
+def estimate_size(value, kind):
+    if kind == "data":
+        try:
+            return len(pickle.dumps(value))
+        except Exception:
+            return sys.getsizeof(value)
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class CacheStats:
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.policy = {}
+        self.calls = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.compute_seconds = 0.0
+        self.clears = 0
+        self.evictions = 0
+        # key -> (time computed, size, clear args) of the entries that should
+        # still be cached, least recently used first; size is a callable for
+        # resources, which can grow after creation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        ttl = self.policy.get("ttl")
+        if ttl is not None:
+            cutoff = time.time() - ttl
+            for key in [key for key, (computed, _, _) in self._entries.items() if computed < cutoff]:
+                del self._entries[key]
+        max_entries = self.policy.get("max_entries")
+        if max_entries is not None:
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def record_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def record_miss(self, seconds, size, key=None, clear_args=None):
+        with self._lock:
+            self.misses += 1
+            self.compute_seconds += seconds
+            key = object() if key is None else key
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time(), size, clear_args)
+            self._prune()
+
+    def record_hit(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+    def record_disk_hit(self):
+        with self._lock:
+            self.disk_hits += 1
+
+    def record_clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.clears += 1
+
+    def _bytes(self):
+        return sum(size() if callable(size) else size for _, size, _ in self._entries.values())
+
+    def bytes_held(self):
+        with self._lock:
+            self._prune()
+            return self._bytes()
+
+    # Drops least recently used entries until the estimate fits max_bytes and
+    # returns their clear args, for the caller to clear from the real cache
+    def evict(self, max_bytes):
+        with self._lock:
+            self._prune()
+            sizes = {key: size() if callable(size) else size for key, (_, size, _) in self._entries.items()}
+            total = sum(sizes.values())
+            evicted = []
+            while total > max_bytes and self._entries:
+                key, (_, _, clear_args) = self._entries.popitem(last=False)
+                total -= sizes[key]
+                evicted.append(clear_args)
+            self.evictions += len(evicted)
+            return evicted
+
+    def report(self):
+        with self._lock:
+            self._prune()
+            hits = self.calls - self.misses
+            mean_compute = self.compute_seconds / self.misses if self.misses else 0.0
+            return {
+                "function": self.name,
+                "type": self.kind,
+                "calls": self.calls,
+                "hits": hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": hits / self.calls if self.calls else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes(),
+                "compute_s": self.compute_seconds,
+                "saved_s": hits * mean_compute,
+                "clears": self.clears,
+                "evictions": self.evictions,
+                "ttl": self.policy.get("ttl"),
+                "max_entries": self.policy.get("max_entries"),
+                "max_bytes": self.policy.get("max_bytes"),
+                "shared": bool(self.policy.get("shared")),
+            }
+
+
+def _function_name(func):
+    # Scripts run as __main__ under streamlit, so name them by file instead
+    module = os.path.splitext(os.path.basename(func.__code__.co_filename))[0]
+    return f"{module}.{func.__qualname__}"
+
+
+# Key for the shared tier. Like st.cache_data, arguments whose name starts
+# with an underscore are not hashed; the function's bytecode is, so editing
+# the function invalidates its old entries.
+def _shared_key(name, func, args, kwargs):
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    hashed = {k: v for k, v in bound.arguments.items() if not k.startswith("_")}
+    digest = hashlib.sha256(name.encode())
+    digest.update(func.__code__.co_code)
+    digest.update(pickle.dumps(hashed, protocol=4))
+    return f"{name}:{digest.hexdigest()}"
+
+
+# Identifies an entry for LRU eviction: the arguments as passed (which is
+# what st.cache_* hashes), with underscore-named ones, which it does not
+# hash, replaced by None so evicting later does not keep those objects
+# (models, services) alive. The key is None if the arguments do not pickle;
+# such entries still evict, just without their hits counting as uses.
+def _entry_key(func, args, kwargs):
+    names = list(inspect.signature(func).parameters)
+    args = tuple(None if i < len(names) and names[i].startswith("_") else arg for i, arg in enumerate(args))
+    kwargs = {k: None if k.startswith("_") else v for k, v in kwargs.items()}
+    try:
+        key = pickle.dumps((args, kwargs), protocol=4)
+    except Exception:
+        key = None
+    return key, (args, kwargs)
+
+
+def _instrument(decorator, kind, func, name, st_kwargs):
+    name = name or _function_name(func)
+    with _registry_lock:
+        stats = _registry.setdefault(name, CacheStats(name, kind))
+    stats.policy = policy_for(name)
+    policy = stats.policy
+    max_bytes = policy["max_bytes"]
+    shared = None
+    if kind == "data" and policy["shared"]:
+        shared = DiskCache(os.path.join(SHARED_CACHE_DIR, name), ttl=policy["ttl"],
+                           max_entries=policy["max_entries"], max_bytes=policy["max_bytes"])
+
+    # Only runs on a miss
+    @functools.wraps(func)
+    def compute(*args, **kwargs):
+        started = time.perf_counter()
+        if shared is not None:
+            key = _shared_key(name, func, args, kwargs)
+            value, computed = shared.get_or_compute(key, lambda: func(*args, **kwargs))
+            if not computed:
+                stats.record_disk_hit()
+        else:
+            value = func(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        size = estimate_size(value, kind) if kind == "data" else lambda: estimate_size(value, kind)
+        key, clear_args = _entry_key(func, args, kwargs) if max_bytes is not None else (None, None)
+        stats.record_miss(elapsed, size, key, clear_args)
+        return value
+
+    cached = decorator(ttl=policy["ttl"], max_entries=policy["max_entries"], **st_kwargs)(compute)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stats.record_call()
+        value = cached(*args, **kwargs)
+        if max_bytes is not None:
+            key, _ = _entry_key(func, args, kwargs)
+            if key is not None:
+                stats.record_hit(key)
+            for clear_args, clear_kwargs in stats.evict(max_bytes):
+                cached.clear(*clear_args, **clear_kwargs)
+        return value
+
+    def clear(*args, **kwargs):
+        cached.clear(*args, **kwargs)
+        if not args and not kwargs:
+            stats.record_clear()
+
+    wrapper.clear = clear
+    wrapper.stats = stats
+    return wrapper
+
+
+def _make_decorator(decorator, kind):
+    def cache(func=None, *, name=None, **st_kwargs):
+        if func is None:
+            return lambda f: _instrument(decorator, kind, f, name, st_kwargs)
+        return _instrument(decorator, kind, func, name, st_kwargs)
+    return cache
+
+
+cached_data = _make_decorator(st.cache_data, "data")
+cached_resource = _make_decorator(st.cache_resource, "resource")
+
+
+def cache_report():
+    with _registry_lock:
+        stats = list(_registry.values())
+    return [s.report() for s in stats]
+
+
+# Off unless CACHE_INSPECTOR=1: the report covers every visitor's calls, so
+# it is for whoever runs the server, not for the people using the app
+SHOW_CACHE_INSPECTOR = os.environ.get("CACHE_INSPECTOR", "") == "1"
+
+
+def render_cache_inspector(container=None, enabled=None):
+    if not (SHOW_CACHE_INSPECTOR if enabled is None else enabled):
+        return
+    container = container or st.sidebar
+    with container.expander("Cache inspector"):
+        report = cache_report()
+        if not report:
+            st.caption("No cached functions have been called yet.")
+            return
+        st.dataframe(report, hide_index=True)
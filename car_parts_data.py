@@ -0,0 +1,1016 @@
+import io
+import os
+import copy
+import time
+import sqlite3
+import datetime
+import tempfile
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from disk_cache import FileLock
+
+# =====================
+# 🚗 Car Parts Table
+# =====================
+TABLE = "car_parts_monthly_sales"
+COLUMNS = ["id", "parts_id", "date", "volume"]
+
+# Sample of the table shipped with the repo, served by SQLiteSource offline
+LOCAL_PATH = "data/car_parts_monthly_sales.csv"
+
+# Local Parquet copies of the table kept by TableMirror, one per source
+MIRROR_DIR = ".cache"
+MIRROR_TTL = 60
+
+# Rows per request. Supabase's PostgREST caps responses at 1000 rows by
+# default, so larger pages would be silently truncated.
+PAGE_SIZE = 1000
+
+# Rows per chunk when exporting (see Export below)
+EXPORT_CHUNK_ROWS = 50_000
+
+# Buffer dtypes for the known integer columns; anything else is kept as
+# object. A column that turns out to hold nulls falls back to object too.
+COLUMN_DTYPES = {
+    "id": np.int64,
+    "parts_id": np.int64,
+    "volume": np.int64,
+}
+
+
+# =====================
+# 🧱 Columnar Buffer
+# =====================
+# One preallocated NumPy array per column. Pages are written straight into
+# it, so a load never holds the full JSON payload or a list of page frames.
+# Grows by doubling when the row count was not known up front.
+class ColumnBuffer:
+    def __init__(self, columns, capacity=0):
+        self.columns = list(columns)
+        self.size = 0
+        self.capacity = capacity
+        self._arrays = {col: np.empty(capacity, dtype=COLUMN_DTYPES.get(col, object)) for col in self.columns}
+
+    def _reserve(self, n):
+        if n <= self.capacity:
+            return
+        self.capacity = max(n, 2 * self.capacity, 1024)
+        for col, array in self._arrays.items():
+            grown = np.empty(self.capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._arrays[col] = grown
+
+    def append(self, rows):
+        n = len(rows)
+        self._reserve(self.size + n)
+        end = self.size + n
+        for col in self.columns:
+            values = [row.get(col) for row in rows]
+            array = self._arrays[col]
+            try:
+                array[self.size:end] = values
+            except (TypeError, ValueError):
+                array = self._arrays[col] = array.astype(object)
+                array[self.size:end] = values
+        self.size = end
+
+    # Same as append() for rows given as tuples in self.columns order
+    def append_tuples(self, rows):
+        self.append([dict(zip(self.columns, row)) for row in rows])
+
+    def to_frame(self, stop=None):
+        stop = self.size if stop is None else min(stop, self.size)
+        return pd.DataFrame({col: self._arrays[col][:stop] for col in self.columns}, columns=self.columns)
+
+
+# =====================
+# 🧮 Dtype Normalization
+# =====================
+# Raw loads keep dates as strings ("1/1/1998") and every number as int64.
+# normalize_frame() parses the dates, stores parts_id as a categorical and
+# downcasts the numeric columns to the smallest type that holds them,
+# shrinking the frame several-fold. It is idempotent, so frames that were
+# already normalized (e.g. read back from the Parquet mirror) pass through.
+CATEGORICAL_COLUMNS = ["parts_id"]
+DATE_COLUMNS = ["date"]
+
+
+def parse_dates(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    first = series.dropna().iloc[0] if series.notna().any() else ""
+    # The source CSV and the Supabase table store month/day/year text;
+    # SQLiteSource and the Parquet mirror hold ISO dates
+    return pd.to_datetime(series, format="%m/%d/%Y" if "/" in str(first) else "ISO8601")
+
+
+def normalize_frame(df):
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if col in DATE_COLUMNS:
+            series = parse_dates(series)
+        elif col in CATEGORICAL_COLUMNS:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series):
+            series = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            series = pd.to_numeric(series, downcast="float")
+        columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+# Appends new rows to a normalized frame. Categoricals get the union of both
+# category sets, so they stay categorical instead of falling back to object.
+def concat_frames(current, new):
+    new = normalize_frame(new)
+    current = current.copy(deep=False)
+    for col in CATEGORICAL_COLUMNS:
+        if col in current.columns and col in new.columns:
+            categories = current[col].cat.categories.union(new[col].cat.categories)
+            current[col] = current[col].cat.set_categories(categories)
+            new[col] = new[col].cat.set_categories(categories)
+    return pd.concat([current, new], ignore_index=True)
+
+
+# Deep memory per column, in bytes, plus the total
+def memory_usage(df):
+    usage = df.memory_usage(deep=True, index=False)
+    return {**{col: int(n) for col, n in usage.items()}, "total": int(usage.sum())}
+
+
+# =====================
+# 🔎 Filters
+# =====================
+# Backend-neutral filters, translated by each source into its own
+# predicates so only matching rows are transferred. A filter is a tuple:
+#   (column, "between", (low, high))   inclusive range
+#   (column, "in", values)
+#   (column, "not_in", values)
+#   (column, "gt", value)              strictly greater than
+FILTER_OPS = ("between", "in", "not_in", "gt")
+
+# NumPy scalars (e.g. from df.unique()) and dates are not JSON / SQLite
+# parameters; dates are sent as ISO strings, without a time at midnight.
+# Only SQLiteSource receives date filters, since it stores ISO dates.
+def _plain(value):
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        value = pd.Timestamp(value)
+        return value.date().isoformat() if value == value.normalize() else value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+# True when the filters exclude every row, so no query is needed
+def matches_nothing(filters):
+    return any(op == "in" and len(value) == 0 for _, op, value in filters)
+
+
+# The same filters applied to a DataFrame already in memory
+def filter_frame(df, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        series = df[column]
+        if op == "between":
+            low, high = value
+            if pd.api.types.is_datetime64_any_dtype(series):
+                low, high = pd.Timestamp(low), pd.Timestamp(high)
+            mask &= series.between(low, high).to_numpy()
+        elif op in ("in", "not_in"):
+            found = series.isin(list(value)).to_numpy()
+            mask &= found if op == "in" else ~found
+        elif op == "gt":
+            mask &= (series > value).to_numpy()
+        else:
+            raise ValueError(f"Unknown filter op {op!r}")
+    return df[mask]
+
+
+# =====================
+# 🗂️ Column Indexes
+# =====================
+# Built once per loaded frame (lazily, per column, on first use) so filter
+# changes never rescan whole columns:
+#   - range columns (numbers, dates): values sorted once, plus the row
+#     positions in that order; a range is two searchsorted calls and a slice
+#   - categorical columns: rows grouped by category code, so each value maps
+#     to its row positions (an inverted index, n ints in total rather than
+#     one bitmap per value)
+# Several filters combine by intersection, starting from the smallest
+# match. Results are row positions in the frame's original order.
+class FrameIndex:
+    def __init__(self, df):
+        self.df = df
+        self.n_rows = len(df)
+        self._sorted = {}
+        self._groups = {}
+
+    def is_range_column(self, column):
+        series = self.df[column]
+        return pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+
+    # (sorted non-null values, their row positions)
+    def _sorted_column(self, column):
+        if column not in self._sorted:
+            values = self.df[column].to_numpy()
+            positions = np.flatnonzero(~pd.isna(values))
+            order = positions[np.argsort(values[positions], kind="stable")]
+            self._sorted[column] = (values[order], order)
+        return self._sorted[column]
+
+    # (distinct values, code per row, row positions grouped by code, group offsets, non-empty groups)
+    def _grouped_column(self, column):
+        if column not in self._groups:
+            series = self.df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                values = series.cat.categories.to_numpy()
+            else:
+                codes, values = pd.factorize(series)
+            known = codes >= 0
+            order = np.flatnonzero(known)[np.argsort(codes[known], kind="stable")]
+            counts = np.bincount(codes[known], minlength=len(values))
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            # Categories with no rows are dropped from the distinct values
+            present = counts > 0
+            self._groups[column] = (values, codes, order, offsets, present)
+        return self._groups[column]
+
+    def bounds(self, column):
+        if not self.is_range_column(column):
+            values = self.distinct(column)
+            return (values.min(), values.max()) if len(values) else (None, None)
+        values, _ = self._sorted_column(column)
+        return (values[0], values[-1]) if len(values) else (None, None)
+
+    def n_distinct(self, column):
+        if not self.is_range_column(column):
+            return len(self.distinct(column))
+        values, _ = self._sorted_column(column)
+        return int(np.count_nonzero(values[1:] != values[:-1])) + 1 if len(values) else 0
+
+    def distinct(self, column):
+        values, _, _, _, present = self._grouped_column(column)
+        return values[present]
+
+    # Slice of the sorted order holding the rows in range. Bounds are cast to
+    # the column's own dtype first, or searchsorted would convert the whole
+    # sorted array to a common type on every call.
+    def _range_slice(self, column, op, value):
+        values, _ = self._sorted_column(column)
+        low, high = (value[0], value[1]) if op == "between" else (value, None)
+        low_side = "left" if op == "between" else "right"
+        dtype = values.dtype
+        if dtype.kind == "M":
+            low = None if low is None else np.datetime64(pd.Timestamp(low), "ns")
+            high = None if high is None else np.datetime64(pd.Timestamp(high), "ns")
+        elif dtype.kind in "iu":
+            # Integer bounds: > x is >= floor(x) + 1, a fractional >= rounds up
+            low = np.floor(low) + 1 if low_side == "right" else np.ceil(low)
+            low_side = "left"
+            high = None if high is None else np.floor(high)
+            info = np.iinfo(dtype)
+            if low > info.max or (high is not None and high < info.min):
+                return 0, 0
+            low = dtype.type(max(low, info.min))
+            high = None if high is None else dtype.type(min(high, info.max))
+        else:
+            low = dtype.type(low)
+            high = None if high is None else dtype.type(high)
+        start = np.searchsorted(values, low, side=low_side)
+        stop = len(values) if high is None else np.searchsorted(values, high, side="right")
+        return start, max(start, stop)
+
+    def _codes(self, column, wanted):
+        values = self._grouped_column(column)[0]
+        lookup = {value: code for code, value in enumerate(values.tolist())}
+        return [lookup[v] for v in (_plain(v) for v in wanted) if v in lookup]
+
+    # Rows matched by one filter, counted without materializing them
+    def _count(self, column, op, value):
+        if op in ("between", "gt"):
+            start, stop = self._range_slice(column, op, value)
+            return stop - start
+        offsets = self._grouped_column(column)[3]
+        selected = sum(int(offsets[c + 1] - offsets[c]) for c in self._codes(column, value))
+        return selected if op == "in" else self.n_rows - selected
+
+    def _positions(self, column, op, value):
+        if op in ("between", "gt"):
+            start, stop = self._range_slice(column, op, value)
+            return self._sorted_column(column)[1][start:stop]
+        if op in ("in", "not_in"):
+            _, _, order, offsets, _ = self._grouped_column(column)
+            codes = self._codes(column, value)
+            selected = (np.concatenate([order[offsets[c]:offsets[c + 1]] for c in codes])
+                        if codes else np.empty(0, dtype=np.intp))
+            if op == "in":
+                return selected
+            excluded = np.zeros(self.n_rows, dtype=bool)
+            excluded[selected] = True
+            return np.flatnonzero(~excluded)
+        raise ValueError(f"Unknown filter op {op!r}")
+
+    # Which of the candidate rows also pass this filter: O(len(positions))
+    def _matches(self, column, op, value, positions):
+        if op in ("between", "gt"):
+            values = self.df[column].to_numpy()[positions]
+            if values.dtype.kind == "M":
+                convert = lambda v: np.datetime64(pd.Timestamp(v), "ns")
+                value = tuple(map(convert, value)) if op == "between" else convert(value)
+            if op == "gt":
+                return values > value
+            return (values >= value[0]) & (values <= value[1])
+        if op in ("in", "not_in"):
+            values, codes, _, _, _ = self._grouped_column(column)
+            codes = codes[positions]
+            # Slot 0 is for nulls (code -1)
+            selected = np.zeros(len(values) + 1, dtype=bool)
+            selected[np.asarray(self._codes(column, value), dtype=np.intp) + 1] = True
+            found = selected[codes + 1]
+            return found if op == "in" else ~found
+        raise ValueError(f"Unknown filter op {op!r}")
+
+    # Row positions passing every filter, in the frame's row order. Starts
+    # from the filter matching the fewest rows and checks only those rows
+    # against the others.
+    def positions(self, filters):
+        if not filters:
+            return np.arange(self.n_rows)
+        filters = sorted(filters, key=lambda f: self._count(*f))
+        result = self._positions(*filters[0])
+        for f in filters[1:]:
+            if not len(result):
+                break
+            result = result[self._matches(*f, result)]
+        # Back to row order: a sort for small results, a bitmap pass for large ones
+        if len(result) * 16 < self.n_rows:
+            return np.sort(result)
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[result] = True
+        return np.flatnonzero(mask)
+
+    # df can be any frame row-aligned with the indexed one (e.g. a column
+    # projection of it)
+    def filter(self, filters, df=None):
+        df = self.df if df is None else df
+        return df.iloc[self.positions(filters)]
+
+
+# Row count and per-column min / max / distinct count, for table headers.
+# With the frame's FrameIndex this reads the precomputed sorted columns and
+# groups instead of scanning.
+def summarize(df, index=None):
+    use_index = index is not None and index.df is df
+    rows = []
+    for col in df.columns:
+        series = df[col]
+        if use_index:
+            low, high = index.bounds(col)
+            distinct = index.n_distinct(col)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.categories[np.unique(series.cat.codes[series.cat.codes >= 0])]
+            low, high = (values.min(), values.max()) if len(values) else (None, None)
+            distinct = len(values)
+        else:
+            low, high = series.min(), series.max()
+            distinct = series.nunique()
+        if pd.api.types.is_datetime64_any_dtype(series):
+            low, high = pd.Timestamp(low), pd.Timestamp(high)
+        rows.append({"column": col, "min": low, "max": high, "distinct": int(distinct)})
+    return len(df), pd.DataFrame(rows).astype({"min": str, "max": str})
+
+
+def apply_filters(query, filters):
+    for column, op, value in filters:
+        if op == "between":
+            query = query.gte(column, _plain(value[0])).lte(column, _plain(value[1]))
+        elif op == "in":
+            query = query.in_(column, [_plain(v) for v in value])
+        elif op == "not_in":
+            query = query.not_.in_(column, [_plain(v) for v in value])
+        elif op == "gt":
+            query = query.gt(column, _plain(value))
+        else:
+            raise ValueError(f"Unknown filter op {op!r}")
+    return query
+
+
+def _quote(column):
+    if column not in COLUMNS:
+        raise ValueError(f"Unknown column {column!r}")
+    return f'"{column}"'
+
+
+def sql_where(filters):
+    clauses, params = [], []
+    for column, op, value in filters:
+        if op == "between":
+            clauses.append(f"{_quote(column)} BETWEEN ? AND ?")
+            params += [_plain(value[0]), _plain(value[1])]
+        elif op in ("in", "not_in"):
+            placeholders = ",".join("?" * len(value))
+            clauses.append(f"{_quote(column)} {'IN' if op == 'in' else 'NOT IN'} ({placeholders})")
+            params += [_plain(v) for v in value]
+        elif op == "gt":
+            clauses.append(f"{_quote(column)} > ?")
+            params.append(_plain(value))
+        else:
+            raise ValueError(f"Unknown filter op {op!r}")
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+# =====================
+# 📄 Paged Fetch
+# =====================
+# Keyset pagination on `key` (WHERE key > last ORDER BY key LIMIT n): every
+# page costs the same however deep into the table it is, unlike OFFSET
+# ranges. The first request also asks for the exact row count, so the
+# buffer can be allocated once. Yields (rows, total); total is only set on
+# the first page.
+def fetch_pages(client, columns=None, page_size=PAGE_SIZE, table=TABLE, key="id", filters=()):
+    select = list(columns) if columns else ["*"]
+    if columns and key not in select:
+        select.append(key)
+
+    last = None
+    while True:
+        query = client.table(table).select(",".join(select), count="exact" if last is None else None)
+        query = apply_filters(query, filters)
+        if last is not None:
+            query = query.gt(key, last)
+        response = query.order(key).limit(page_size).execute()
+        rows = response.data
+        yield rows, response.count if last is None else None
+        if len(rows) < page_size:
+            return
+        last = rows[-1][key]
+
+
+# Streams every page into a ColumnBuffer and returns the DataFrame.
+# on_page(buffer, total) is called after each page, for progress and previews.
+def load_table(client, columns=None, page_size=PAGE_SIZE, on_page=None, table=TABLE, filters=()):
+    if matches_nothing(filters):
+        return pd.DataFrame(columns=columns or COLUMNS)
+    buffer, total = None, None
+    for rows, count in fetch_pages(client, columns, page_size, table, filters=filters):
+        if buffer is None:
+            total = count
+            buffer = ColumnBuffer(columns or (list(rows[0]) if rows else []), capacity=total or len(rows))
+        buffer.append(rows)
+        if on_page is not None:
+            on_page(buffer, total)
+    return buffer.to_frame() if buffer is not None else pd.DataFrame(columns=columns)
+
+
+# =====================
+# 🔌 Data Sources
+# =====================
+# Interchangeable backends for the dashboard. Both stream results through
+# a ColumnBuffer and share one interface:
+#   load(columns=None, filters=(), page_size=PAGE_SIZE, on_page=None) -> DataFrame
+#   iter_chunks(columns=None, filters=(), chunk_rows=EXPORT_CHUNK_ROWS)
+#       -> normalized DataFrames of about chunk_rows rows, at least one
+# Borrows a client from a process-wide SupabasePool (supabase_pool.py) for
+# the duration of each load
+#
+# The table's date column is month/day/year text ("1/1/1998"), which
+# PostgREST compares as strings, not in date order. Filters on it are
+# therefore not sent: the rows matching the other filters are fetched
+# (with the date column, even if not requested) and the date filters are
+# applied to them after parsing.
+class SupabaseSource:
+    name = "Supabase"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    # (filters sent to PostgREST, filters applied after loading, columns to fetch)
+    def _plan(self, columns, filters):
+        remote = [f for f in filters if f[0] not in DATE_COLUMNS]
+        local = [f for f in filters if f[0] in DATE_COLUMNS]
+        fetch = list(columns) + [f[0] for f in local if f[0] not in columns]
+        return remote, local, list(dict.fromkeys(fetch))
+
+    def _finish(self, df, columns, local):
+        if not local:
+            return df
+        df = filter_frame(normalize_frame(df), local)
+        return df[list(columns)].reset_index(drop=True)
+
+    def load(self, columns=None, filters=(), page_size=PAGE_SIZE, on_page=None):
+        columns = list(columns or COLUMNS)
+        remote, local, fetch = self._plan(columns, filters)
+        with self.pool.borrow() as client:
+            df = load_table(client, fetch, page_size, on_page, filters=remote)
+        return self._finish(df, columns, local)
+
+    # Keeps the borrowed client until the consumer has taken the last chunk
+    def iter_chunks(self, columns=None, filters=(), chunk_rows=EXPORT_CHUNK_ROWS):
+        columns = list(columns or COLUMNS)
+        if matches_nothing(filters):
+            yield pd.DataFrame(columns=columns)
+            return
+        remote, local, fetch = self._plan(columns, filters)
+        buffer = ColumnBuffer(fetch, capacity=chunk_rows)
+        yielded = False
+        with self.pool.borrow() as client:
+            for rows, _ in fetch_pages(client, fetch, filters=remote):
+                buffer.append(rows)
+                if buffer.size >= chunk_rows:
+                    yield normalize_frame(self._finish(buffer.to_frame(), columns, local))
+                    buffer = ColumnBuffer(fetch, capacity=chunk_rows)
+                    yielded = True
+        if buffer.size or not yielded:
+            yield normalize_frame(self._finish(buffer.to_frame(), columns, local))
+
+
+# The CSV sample loaded into an in-memory SQLite database, for offline use
+# and benchmarking. One instance can be shared by every session: each load
+# opens its own connection to the shared-cache database, while the
+# connection held here keeps it alive.
+class SQLiteSource:
+    name = "Local SQLite"
+    _ids = itertools.count()
+
+    def __init__(self, csv_path=LOCAL_PATH, df=None):
+        self.uri = f"file:car_parts_{next(SQLiteSource._ids)}?mode=memory&cache=shared"
+        self._conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+        # The CSV starts with a byte order mark ("\ufeffid"). Dates are
+        # stored as ISO text, so date ranges compare correctly in SQL.
+        if df is None:
+            df = pd.read_csv(csv_path, encoding="utf-8-sig")
+        df = df.assign(**{col: parse_dates(df[col]).dt.strftime("%Y-%m-%d") for col in DATE_COLUMNS})
+        df.to_sql(TABLE, self._conn, index=False)
+        for column in ("parts_id", "date", "volume"):
+            self._conn.execute(f"CREATE INDEX idx_{column} ON {TABLE} ({_quote(column)})")
+        self._conn.commit()
+
+    def load(self, columns=None, filters=(), page_size=PAGE_SIZE, on_page=None):
+        columns = list(columns or COLUMNS)
+        if matches_nothing(filters):
+            return pd.DataFrame(columns=columns)
+        where, params = sql_where(filters)
+
+        conn = sqlite3.connect(self.uri, uri=True)
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM {TABLE}{where}", params).fetchone()[0]
+            buffer = ColumnBuffer(columns, capacity=total)
+            cursor = conn.execute(
+                f"SELECT {', '.join(_quote(c) for c in columns)} FROM {TABLE}{where} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                buffer.append_tuples(rows)
+                if on_page is not None:
+                    on_page(buffer, total)
+        finally:
+            conn.close()
+        return buffer.to_frame()
+
+    def iter_chunks(self, columns=None, filters=(), chunk_rows=EXPORT_CHUNK_ROWS):
+        columns = list(columns or COLUMNS)
+        if matches_nothing(filters):
+            yield pd.DataFrame(columns=columns)
+            return
+        where, params = sql_where(filters)
+
+        conn = sqlite3.connect(self.uri, uri=True)
+        try:
+            cursor = conn.execute(
+                f"SELECT {', '.join(_quote(c) for c in columns)} FROM {TABLE}{where} ORDER BY id", params)
+            rows = cursor.fetchmany(chunk_rows)
+            while True:
+                buffer = ColumnBuffer(columns, capacity=len(rows))
+                buffer.append_tuples(rows)
+                yield normalize_frame(buffer.to_frame())
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+        finally:
+            conn.close()
+
+
+# =====================
+# 📊 Rollups
+# =====================
+# Total volume per part per month, kept as a dense (parts x months) array
+# built with one np.bincount over flattened (part code, month) group codes.
+# Part x year, monthly and yearly totals are reductions of that array
+# (np.add.reduceat at year boundaries, sums over an axis), so no chart
+# needs a group-by over the raw rows. add() folds in new rows only, and
+# replaces the arrays rather than updating them in place, so extended()
+# can hand a delta sync a new Rollups while sessions keep reading the old.
+class Rollups:
+    def __init__(self, df=None):
+        self.parts = np.empty(0, dtype=np.int64)
+        self._part_codes = {}
+        self.first_month = None
+        self.volume = np.zeros((0, 0))
+        self.rows = 0
+        if df is not None:
+            self.add(df)
+
+    # A copy with df's rows added; this one is left as it was
+    def extended(self, df):
+        return copy.copy(self).add(df)
+
+    @property
+    def n_months(self):
+        return self.volume.shape[1]
+
+    def add(self, df):
+        df = normalize_frame(df[["parts_id", "date", "volume"]])
+        dates = df["date"].to_numpy()
+        category_codes = df["parts_id"].cat.codes.to_numpy()
+        keep = ~pd.isna(dates) & (category_codes >= 0)
+        if not keep.any():
+            return self
+        # Months since 1970-01
+        months = dates[keep].astype("datetime64[M]").astype(np.int64)
+        category_codes = category_codes[keep]
+        volume = np.nan_to_num(df["volume"].to_numpy(dtype=np.float64)[keep])
+
+        # Part codes per category of this frame, numbering unseen parts
+        # after the known ones; rows are then mapped with one lookup
+        categories = df["parts_id"].cat.categories
+        present = np.bincount(category_codes, minlength=len(categories)) > 0
+        part_codes = dict(self._part_codes)
+        lookup = np.full(len(categories), -1, dtype=np.int64)
+        for i in np.flatnonzero(present).tolist():
+            part = _plain(categories[i])
+            lookup[i] = part_codes.setdefault(part, len(part_codes))
+        all_parts = np.array(list(part_codes), dtype=np.int64)
+
+        first, last = int(months.min()), int(months.max())
+        if self.first_month is not None:
+            first = min(first, self.first_month)
+            last = max(last, self.first_month + self.n_months - 1)
+        n_months = last - first + 1
+
+        # Grow to the new part and month ranges, then add this batch's sums
+        volume_grid = np.zeros((len(all_parts), n_months))
+        if self.first_month is not None:
+            offset = self.first_month - first
+            volume_grid[:len(self.parts), offset:offset + self.n_months] = self.volume
+        flat = lookup[category_codes] * n_months + (months - first)
+        volume_grid += np.bincount(flat, weights=volume, minlength=volume_grid.size).reshape(volume_grid.shape)
+
+        self.parts, self._part_codes = all_parts, part_codes
+        self.first_month, self.volume = first, volume_grid
+        self.rows += int(keep.sum())
+        return self
+
+    def month_index(self):
+        return pd.DatetimeIndex((np.datetime64("1970-01", "M") + self.first_month + np.arange(self.n_months)).astype("datetime64[ns]"), name="month")
+
+    def _year_starts(self):
+        years = self.month_index().year.to_numpy()
+        starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+        return starts, years[starts]
+
+    def _select(self, parts):
+        if parts is None:
+            return self.parts, self.volume
+        codes = [self._part_codes[p] for p in (_plain(p) for p in parts) if p in self._part_codes]
+        return self.parts[codes], self.volume[codes]
+
+    # Months as rows, one column per part
+    def part_month(self, parts=None):
+        parts, volume = self._select(parts)
+        return pd.DataFrame(volume.T, index=self.month_index(), columns=pd.Index(parts, name="parts_id"))
+
+    def part_year(self, parts=None):
+        parts, volume = self._select(parts)
+        if not volume.shape[1]:
+            return pd.DataFrame(columns=pd.Index(parts, name="parts_id"))
+        starts, years = self._year_starts()
+        return pd.DataFrame(np.add.reduceat(volume, starts, axis=1).T,
+                            index=pd.Index(years, name="year"), columns=pd.Index(parts, name="parts_id"))
+
+    def monthly_totals(self):
+        return pd.Series(self.volume.sum(axis=0), index=self.month_index(), name="volume")
+
+    def yearly_totals(self):
+        if not self.n_months:
+            return pd.Series(dtype=np.float64, name="volume")
+        starts, years = self._year_starts()
+        return pd.Series(np.add.reduceat(self.volume.sum(axis=0), starts), index=pd.Index(years, name="year"), name="volume")
+
+    def top_parts(self, n=5):
+        return self.parts[np.argsort(-self.volume.sum(axis=1), kind="stable")[:n]]
+
+
+# =====================
+# 🪞 Local Mirror
+# =====================
+# A Parquet copy of the whole table, shared by every session (and every
+# server process on the host). get() serves it straight from memory while it
+# is younger than ttl seconds; after that, the next get() fetches only the
+# rows with an id above the highest one mirrored and appends them. sync(full=True)
+# refetches everything, which is the only way to pick up rows that were
+# updated or deleted, since the table has no modification timestamp.
+#
+# Syncs run under a file lock: a process that waited for another's sync
+# reads the result from disk instead of syncing again.
+class TableMirror:
+    def __init__(self, source, path, ttl=MIRROR_TTL):
+        self.source = source
+        self.path = path
+        self.ttl = ttl
+        self.df = None
+        self._mtime = None
+        self._index = None
+        self._rollups = None
+        self.last_sync = None
+
+    # FrameIndex of a frame this mirror returned (default: the current one),
+    # shared by every session using that frame
+    def index(self, df=None):
+        df = self.df if df is None else df
+        index = self._index
+        if index is None or index.df is not df:
+            index = FrameIndex(df)
+            if df is self.df:
+                self._index = index
+        return index
+
+    # Rollups of a frame this mirror returned (default: the current one).
+    # Delta syncs fold their new rows in; they are rebuilt after a full
+    # resync or when another process has synced the file.
+    def rollups(self, df=None):
+        df = self.df if df is None else df
+        cached = self._rollups
+        if cached is not None and cached[0] is df:
+            return cached[1]
+        rollups = Rollups(df)
+        if df is self.df:
+            self._rollups = (df, rollups)
+        return rollups
+
+    # The file's mtime records the last sync, by whichever process ran it
+    def synced_at(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def is_stale(self):
+        synced_at = self.synced_at()
+        return synced_at is None or time.time() - synced_at > self.ttl
+
+    def _read(self):
+        mtime = self.synced_at()
+        if mtime is not None and (self.df is None or mtime != self._mtime):
+            self.df = normalize_frame(pd.read_parquet(self.path))
+            self._mtime = mtime
+        return self.df
+
+    def _write(self, df, changed):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if changed or not os.path.exists(self.path):
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+        else:
+            os.utime(self.path)
+        self._mtime = self.synced_at()
+
+    def get(self, on_page=None):
+        if not self.is_stale():
+            return self._read()
+        return self.sync(on_page=on_page, if_stale=True)
+
+    def sync(self, full=False, on_page=None, if_stale=False):
+        with FileLock(self.path + ".lock"):
+            if if_stale and not self.is_stale():
+                return self._read()
+            current = None if full else self._read()
+
+            started = time.perf_counter()
+            memory = None
+            if current is None:
+                raw = self.source.load(on_page=on_page)
+                df = normalize_frame(raw)
+                fetched, mode = len(df), "full"
+                memory = {"before": memory_usage(raw), "after": memory_usage(df)}
+            else:
+                last_id = int(current["id"].max()) if len(current) else 0
+                delta = self.source.load(filters=[("id", "gt", last_id)], on_page=on_page)
+                df = concat_frames(current, delta) if len(delta) else current
+                fetched, mode = len(delta), "delta"
+                # Fold only the new rows into the rollups of the frame they extend
+                if len(delta) and self._rollups is not None and self._rollups[0] is current:
+                    self._rollups = (df, self._rollups[1].extended(delta))
+
+            self._write(df, changed=mode == "full" or fetched > 0)
+            self.df = df
+            self.last_sync = {"mode": mode, "rows_fetched": fetched, "rows": len(df),
+                              "seconds": time.perf_counter() - started, "memory": memory}
+            return df
+
+
+# =====================
+# 📤 Export
+# =====================
+# Exports are written chunk by chunk: a generator of DataFrames (a slice of
+# a loaded frame, or a source's iter_chunks() for the same query run in the
+# database) is encoded one chunk at a time, CSV text or one Parquet row
+# group per chunk, and the bytes go straight to a temporary file. While
+# encoding, only one chunk and its encoded bytes are in memory, and only the
+# exported columns are ever copied.
+#
+# The finished file is then read back as one bytes object: Streamlit's
+# download_button only serves data it holds in memory (its media store
+# keeps the whole file for the session), so a download costs the full file
+# size in RAM once. It never costs the frame's text plus a second copy.
+
+# Label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+# Slices of df with only the given columns; at least one, so an empty
+# export still has a header / schema
+def frame_chunks(df, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    columns = list(df.columns) if columns is None else list(columns)
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows][columns]
+
+
+def csv_chunks(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode()
+        header = False
+
+
+# ParquetWriter output that is handed on after every row group instead of
+# accumulated. The writer takes file offsets from tell(), so the position
+# is counted here rather than by a buffer that gets emptied.
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+# Per-chunk normalization can pick different integer widths and category
+# sets, so every chunk is written with plain, widest types
+def _export_schema(schema):
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        type_ = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+        if pa.types.is_signed_integer(type_):
+            type_ = pa.int64()
+        elif pa.types.is_floating(type_):
+            type_ = pa.float64()
+        fields.append(pa.field(field.name, type_))
+    return pa.schema(fields)
+
+
+def parquet_chunks(chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer, schema = None, None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            schema = _export_schema(table.schema)
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(table.cast(schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+EXPORT_WRITERS = {"CSV": csv_chunks, "Parquet": parquet_chunks}
+
+
+# Writes the export through an anonymous temporary file, closed (and so
+# removed) before returning its contents as bytes, which download_button
+# accepts
+def export_file(chunks, fmt="CSV"):
+    with tempfile.TemporaryFile() as file:
+        for data in EXPORT_WRITERS[fmt](chunks):
+            file.write(data)
+        file.seek(0)
+        return file.read()
+
+
+# =====================
+# 📏 Benchmark
+# =====================
+# python car_parts_data.py [rows]
+# Compares the old single select("*") + json_normalize against the paged
+# load, on the sample CSV repeated up to `rows` rows and served by a small
+# in-process stand-in for the PostgREST query builder.
+if __name__ == "__main__":
+    import sys
+    import time
+    import tracemalloc
+
+    class _Response:
+        def __init__(self, data, count):
+            self.data = data
+            self.count = count
+
+    class _StubQuery:
+        def __init__(self, frame):
+            self.frame = frame
+            self.columns = None
+            self.count = None
+            self.n = None
+
+        def select(self, columns, count=None):
+            self.columns = None if columns == "*" else columns.split(",")
+            self.count = count
+            return self
+
+        # The stand-in table is stored sorted by id, like its primary key index
+        def gt(self, col, value):
+            self.frame = self.frame.iloc[self.frame[col].searchsorted(value, side="right"):]
+            return self
+
+        def order(self, col):
+            return self
+
+        def limit(self, n):
+            self.n = n
+            return self
+
+        def execute(self):
+            total = len(self.frame) if self.count else None
+            frame = self.frame if self.n is None else self.frame.iloc[:self.n]
+            if self.columns:
+                frame = frame[self.columns]
+            return _Response(frame.to_dict("records"), total)
+
+    class _StubClient:
+        def __init__(self, frame):
+            self.frame = frame
+
+        def table(self, name):
+            return _StubQuery(self.frame)
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sample = pd.read_csv("data/car_parts_monthly_sales.csv", encoding="utf-8-sig")
+    frame = pd.concat([sample] * (n_rows // len(sample) + 1), ignore_index=True).iloc[:n_rows]
+    frame["id"] = np.arange(1, n_rows + 1)
+    client = _StubClient(frame)
+
+    def measure(label, load):
+        tracemalloc.start()
+        started = time.perf_counter()
+        df = load()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+        print(f"{label:<28} {elapsed:7.2f} s  peak {peak:8.1f} MB  {df.shape}")
+        return df
+
+    print(f"{n_rows:,} rows")
+    full = measure("select(*) + json_normalize", lambda: pd.json_normalize(client.table(TABLE).select("*").execute().data))
+    paged = measure("paged", lambda: load_table(client))
+    measure("paged, 2 columns", lambda: load_table(client, ["parts_id", "volume"]))
+    assert full.astype(str).equals(paged.astype(str))
+
+    # Filter pushdown: load everything and filter in pandas, or let the
+    # backend apply the predicates
+    source = SQLiteSource(df=frame)
+    filters = [("volume", "between", (5, 10)), ("parts_id", "in", [2674, 2673])]
+    local = measure("sqlite, filter in pandas", lambda: (lambda df: df[
+        df["volume"].between(5, 10) & df["parts_id"].isin([2674, 2673])].reset_index(drop=True))(source.load()))
+    pushed = measure("sqlite, filters pushed down", lambda: source.load(filters=filters))
+    assert local.equals(pushed)
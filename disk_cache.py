@@ -0,0 +1,195 @@
+import os
+import time
+import pickle
+import hashlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# =====================
+# 💾 Shared Disk Cache
+# =====================
+# File-based result cache shared by every server process on one host.
+#   - Writes go to a temp file in the same directory and are renamed into
+#     place, so readers only ever see complete entries.
+#   - get_or_compute() takes the key's lock before computing, so when N
+#     cold workers ask for the same key, one computes and the others wait
+#     and then read its result (stampede protection). Keys share
+#     LOCK_STRIPES lock files, so locks never pile up on disk.
+#   - Entries past ttl, and the oldest entries beyond max_entries or
+#     max_bytes, are deleted by prune(), which set() runs at most every
+#     prune_interval seconds (by whichever process gets the directory lock).
+SHARED_CACHE_DIR = os.environ.get("SHARED_CACHE_DIR", os.path.join(".cache", "shared"))
+LOCK_STRIPES = 64
+
+
+class FileLock:
+    # Exclusive lock on path, held across processes. Uses flock where
+    # available (released by the OS if the holder dies); elsewhere falls back
+    # to an O_EXCL lock file that is considered stale after stale_after s.
+    def __init__(self, path, timeout=None, poll_interval=0.05, stale_after=3600):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._fd = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        while True:
+            if self._try_acquire():
+                return self
+            if deadline is not None and time.monotonic() > deadline:
+                if self._fd is not None and fcntl is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                raise TimeoutError(f"Timed out waiting for lock {self.path}")
+            time.sleep(self.poll_interval)
+
+    def _try_acquire(self):
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                return False
+        try:
+            self._fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                    os.remove(self.path)
+            except OSError:
+                pass
+            return False
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        else:
+            os.close(self._fd)
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class DiskCache:
+    def __init__(self, directory=SHARED_CACHE_DIR, ttl=None, lock_timeout=None,
+                 max_entries=None, max_bytes=None, prune_interval=60):
+        self.directory = directory
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, key):
+        digest = self._digest(key)
+        return os.path.join(self.directory, digest[:2], f"{digest}.pkl")
+
+    # (True, value) on a fresh entry, (False, None) otherwise
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return False, None
+            with open(path, "rb") as file:
+                return True, pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{time.monotonic_ns()}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        if time.monotonic() - self._pruned_at > self.prune_interval:
+            self.prune()
+
+    def lock(self, key):
+        stripe = int(self._digest(key)[:8], 16) % LOCK_STRIPES
+        return FileLock(os.path.join(self.directory, "locks", f"{stripe}.lock"), timeout=self.lock_timeout)
+
+    # Deletes expired entries, then the least recently written ones until
+    # max_entries and max_bytes hold. Skipped if another process is pruning.
+    # Returns the number of entries deleted.
+    def prune(self):
+        self._pruned_at = time.monotonic()
+        lock = FileLock(os.path.join(self.directory, "prune.lock"), timeout=0)
+        try:
+            lock.acquire()
+        except TimeoutError:
+            return 0
+        try:
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".pkl"):
+                        path = os.path.join(root, name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+
+            now = time.time()
+            expired = 0
+            if self.ttl is not None:
+                while expired < len(entries) and now - entries[expired][0] > self.ttl:
+                    expired += 1
+            keep = entries[expired:]
+            total = sum(size for _, size, _ in keep)
+            drop = entries[:expired]
+            while keep and ((self.max_entries is not None and len(keep) > self.max_entries)
+                            or (self.max_bytes is not None and total > self.max_bytes)):
+                total -= keep[0][1]
+                drop.append(keep.pop(0))
+
+            for _, _, path in drop:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return len(drop)
+        finally:
+            lock.release()
+
+    # Returns (value, computed_here)
+    def get_or_compute(self, key, compute):
+        hit, value = self.get(key)
+        if hit:
+            return value, False
+        with self.lock(key):
+            # Another process may have finished it while we waited
+            hit, value = self.get(key)
+            if hit:
+                return value, False
+            value = compute()
+            self.set(key, value)
+            return value, True
@@ -0,0 +1,107 @@
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+# =====================
+# ⏱️ Import-Time Profiler
+# =====================
+# Runs each entry script once, as a new session in a fresh interpreter
+# (streamlit's AppTest, under python -X importtime), and reports what the
+# script imported on that first run: total import time, the slowest
+# top-level packages, and the wall time of the whole run. Streamlit itself
+# is imported before the run starts, so it is not counted.
+#
+#   python import_profile.py                      # every entry script
+#   python import_profile.py DB.py --top 5
+#   python import_profile.py --json > before.json   # to diff two versions
+ENTRY_SCRIPTS = [
+    "First_Project_Stats_Canada.py",
+    "ClassificationGboost.py",
+    "model_gboost_app.py",
+    "DB.py",
+    "Authentication.py",
+    "Strong_Authentication.py",
+    "ChatBoxAuthentication.py",
+    "ChatBoxReturn.py",
+    "App_multipages.py",
+]
+
+MARKER = "@@import-profile-start"
+
+# The first run of a script, timed. Exceptions (missing secrets, missing
+# optional packages) are reported by AppTest instead of raised, so the
+# imports made before them are still counted.
+RUNNER = f"""
+import sys, json, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+print({MARKER!r}, file=sys.stderr, flush=True)
+started = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - started
+error = at.exception[0].message if at.exception else None
+print({MARKER!r} + "end", elapsed, json.dumps(error), file=sys.stderr, flush=True)
+"""
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_script(script):
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", RUNNER, script],
+                            capture_output=True, text=True, env=env)
+    started = False
+    imports = []
+    elapsed, error = None, None
+    for line in result.stderr.splitlines():
+        if line.startswith(MARKER + "end"):
+            _, seconds, error = line.split(" ", 2)
+            elapsed = float(seconds)
+            error = json.loads(error)
+            break
+        if line.startswith(MARKER):
+            started = True
+            continue
+        match = LINE.match(line)
+        if started and match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((len(indent), module, int(cumulative_us)))
+
+    # importtime prints children before their parent; the least indented
+    # lines are the imports the script (and its own modules) asked for
+    top_level = [(module, us) for depth, module, us in imports if depth == 1]
+    packages = {}
+    for module, us in top_level:
+        packages[module.split(".")[0]] = packages.get(module.split(".")[0], 0) + us
+    return {
+        "script": script,
+        "run_s": elapsed,
+        "import_s": sum(us for _, us in top_level) / 1e6,
+        "modules": len(imports),
+        "slowest": sorted(((p, us / 1e6) for p, us in packages.items()), key=lambda x: -x[1]),
+        "error": error,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import time of each entry script's first run")
+    parser.add_argument("scripts", nargs="*", default=ENTRY_SCRIPTS)
+    parser.add_argument("--top", type=int, default=3, help="slowest packages to list per script")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = parser.parse_args()
+
+    reports = [profile_script(script) for script in args.scripts]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        sys.exit(0)
+
+    print(f"{'script':<32} {'run s':>7} {'import s':>9} {'modules':>8}  slowest imports")
+    for r in reports:
+        slowest = ", ".join(f"{p} {s:.2f}s" for p, s in r["slowest"][:args.top])
+        run_s = f"{r['run_s']:7.2f}" if r["run_s"] is not None else f"{'-':>7}"
+        print(f"{r['script']:<32} {run_s} {r['import_s']:9.2f} {r['modules']:8d}  {slowest}")
+        if r["error"]:
+            print(f"{'':<32} stopped at: {r['error'][:100]}")
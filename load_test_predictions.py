@@ -0,0 +1,85 @@
+import time
+import argparse
+import threading
+import warnings
+
+import numpy as np
+
+from prediction_service import PredictionService
+
+# =====================
+# 🏋️ Prediction Load Test
+# =====================
+# Simulates N concurrent sessions, each asking for one prediction at a time,
+# first with direct per-session predict() calls and then through the shared
+# micro-batching service at several batch-size / wait settings. Prints
+# throughput against p50/p99 latency for each configuration.
+#
+#   python load_test_predictions.py --sessions 64 --seconds 5 --backend pipeline
+
+def load_backend(name):
+    if name == "pipeline":
+        from joblib import load
+
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        pipe = load("model/gboost_pipe.joblib")
+        return pipe.predict, pipe.named_steps["encoder"].categories_
+    if name == "compiled":
+        from tree_compiler import load_or_compile
+
+        compiled = load_or_compile()
+        return compiled.predict, compiled.categories_
+    if name == "table":
+        from prediction_table import PredictionTable
+
+        table = PredictionTable.load()
+        if table is None:
+            raise SystemExit("Prediction table not built; run python prediction_table.py")
+        return table.predict, table.categories_
+    raise SystemExit(f"Unknown backend {name}")
+
+
+def run(ask, rows, sessions, seconds):
+    latencies = [[] for _ in range(sessions)]
+    stop_at = time.perf_counter() + seconds
+
+    def session(i):
+        rng = np.random.default_rng(i)
+        while time.perf_counter() < stop_at:
+            row = rows[rng.integers(len(rows))]
+            started = time.perf_counter()
+            ask(row)
+            latencies[i].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = np.concatenate([np.asarray(lat) for lat in latencies]) * 1000
+    return all_latencies.size / seconds, np.percentile(all_latencies, 50), np.percentile(all_latencies, 99)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test single-row mushroom predictions")
+    parser.add_argument("--backend", choices=["pipeline", "compiled", "table"], default="pipeline")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    predict, categories = load_backend(args.backend)
+    rng = np.random.default_rng(0)
+    rows = np.column_stack([rng.choice(cats, 1000) for cats in categories])
+
+    print(f"backend={args.backend} sessions={args.sessions} seconds={args.seconds}")
+    print(f"{'mode':<28} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'mean batch':>11}")
+
+    throughput, p50, p99 = run(lambda row: predict(row.reshape(1, -1))[0], rows, args.sessions, args.seconds)
+    print(f"{'direct':<28} {throughput:10.0f} {p50:9.2f} {p99:9.2f} {1:11.1f}")
+
+    for max_batch_size, max_wait_ms in ((16, 1), (64, 2), (256, 5)):
+        service = PredictionService(predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        throughput, p50, p99 = run(service.predict_one, rows, args.sessions, args.seconds)
+        label = f"batched ({max_batch_size}, {max_wait_ms} ms)"
+        print(f"{label:<28} {throughput:10.0f} {p50:9.2f} {p99:9.2f} {service.stats()['mean_batch_size']:11.1f}")
@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import hashlib
+from functools import lru_cache
+
+import joblib
+
+# =====================
+# 📦 Versioned Training Artifacts
+# =====================
+# Fitted encoders + model are saved under model/artifacts/<key>.joblib where
+# key hashes the training file contents, the hyperparameters and the library
+# versions. A restart loads the matching artifact instead of refitting, and a
+# change to any of those inputs produces a new key (and a retrain).
+ARTIFACT_DIR = "model/artifacts"
+
+# Bump when the layout of the saved bundle changes
+ARTIFACT_FORMAT = 1
+
+
+# sha256 of a file, memoized on (path, size, mtime) so unchanged files
+# are only read once per process
+def file_sha256(path):
+    stat = os.stat(path)
+    return _file_sha256(path, stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=64)
+def _file_sha256(path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_key(data_path, params):
+    import sklearn
+
+    payload = json.dumps({
+        "data": file_sha256(data_path),
+        "params": params,
+        "sklearn": sklearn.__version__,
+        "format": ARTIFACT_FORMAT,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def artifact_path(key, artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, f"{key}.joblib")
+
+
+# Returns the saved bundle for key, or None if it is missing or unreadable
+def load_artifact(key, artifact_dir=ARTIFACT_DIR):
+    path = artifact_path(key, artifact_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        saved = joblib.load(path)
+    except Exception:
+        return None
+    if saved.get("key") != key:
+        return None
+    return saved["bundle"]
+
+
+# Written to a temp file and renamed, so readers never see a partial artifact
+def save_artifact(key, bundle, metadata=None, artifact_dir=ARTIFACT_DIR):
+    os.makedirs(artifact_dir, exist_ok=True)
+    path = artifact_path(key, artifact_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({
+        "key": key,
+        "created_at": time.time(),
+        "metadata": metadata or {},
+        "bundle": bundle,
+    }, tmp_path)
+    os.replace(tmp_path, path)
+    return path
@@ -1,27 +1,51 @@
 import streamlit as st
-import numpy as np
-from joblib import load
 
+from cache_inspector import cached_data, cached_resource, render_cache_inspector
+from mushroom_batch import batch_prediction_ui
+from prediction_service import PredictionService
+from prediction_table import PredictionTable
+from tree_compiler import load_or_compile
 
-@st.cache_resource(show_spinner="Loading model...")
+
+# Array-compiled version of model/gboost_pipe.joblib (see tree_compiler.py);
+# predicting with it needs neither sklearn nor the Pipeline
+@cached_resource(show_spinner="Loading model...")
 def load_model():
     try:
         path = "model/gboost_pipe.joblib"
-        pipe = load(path)
+        pipe = load_or_compile(path)
         return pipe
     except Exception as e:
         st.error(f"Failed to load model from `{path}`. Error: {e}")
         raise
 
-@st.cache_data(show_spinner="Making a prediction...")
-def make_prediction(_pipe, X_pred):
+# Precomputed prediction for every input combination (see prediction_table.py),
+# memory-mapped; None if it has not been built for the current model file
+@cached_resource(show_spinner="Loading prediction table...")
+def load_prediction_table():
+    return PredictionTable.load()
+
+# Shared by all sessions: single-row requests are queued and predicted in
+# micro-batches (see prediction_service.py / load_test_predictions.py). With
+# the lookup table loaded a row is one O(1) lookup, answered directly.
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 1.0
+
+@cached_resource
+def get_prediction_service():
+    table = load_prediction_table()
+    if table is not None:
+        return PredictionService(table.predict, predict_row=table.predict_one)
+    return PredictionService(load_model().predict, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS)
+
+@cached_data(show_spinner="Making a prediction...")
+def make_prediction(_service, X_pred):
 
     features = [each[0] for each in X_pred]
-    features = np.array(features).reshape(1,-1)
 
-    pred = _pipe.predict(features)
+    pred = _service.predict_one(features)
 
-    return pred[0]
+    return pred
 
 if __name__ == "__main__":
     st.title("Mushroom classifier 🍄")
@@ -48,7 +72,7 @@ if __name__ == "__main__":
     pred_btn = st.button("Predict", type="primary")
 
     if pred_btn:
-        pipe = load_model()
+        service = get_prediction_service()
 
         x_pred = [odor, 
                   gill_size, 
@@ -60,8 +84,28 @@ if __name__ == "__main__":
                   ring_type, 
                   spore_print_color]
         
-        pred = make_prediction(pipe, x_pred)
+        pred = make_prediction(service, x_pred)
+        st.session_state.service_used = True
 
         nice_pred = "The mushroom is poisonous 🤢" if pred == 'p' else "The mushroom is edible 🍴"
 
         st.write(nice_pred)
+
+    # Many specimens at once, predicted in chunks through the same pipeline.
+    # The pipeline is a process-wide cached object, replaced on reload, so
+    # its identity keys the session's batch results.
+    def load_predictor():
+        pipe = load_prediction_table() or load_model()
+        return pipe.predict, pipe, id(pipe)
+
+    batch_prediction_ui(load_predictor)
+
+    # Only once this session has predicted, so the first paint does not
+    # load the model just to report on it
+    if st.session_state.get("service_used"):
+        with st.sidebar.expander("Prediction service metrics"):
+            st.json(get_prediction_service().stats())
+
+    # Hits/misses, entries, bytes and time saved for every cached function;
+    # only shown to whoever started the server with CACHE_INSPECTOR=1
+    render_cache_inspector()
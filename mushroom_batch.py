@@ -0,0 +1,130 @@
+import numpy as np
+import streamlit as st
+
+# Model inputs, in the order the encoder was fitted with
+FEATURES = ['odor', 'gill-size', 'gill-color', 'stalk-surface-above-ring',
+            'stalk-surface-below-ring', 'stalk-color-above-ring',
+            'stalk-color-below-ring', 'ring-type', 'spore-print-color']
+
+CHUNK_SIZE = 50_000
+
+# =====================
+# 📂 Parsing
+# =====================
+# pandas is imported by the functions that need it, so rendering the
+# uploader alone does not load it
+def read_specimens(uploaded_file):
+    import pandas as pd
+
+    if uploaded_file.name.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(uploaded_file)
+    return pd.read_csv(uploaded_file, dtype=str)
+
+
+# Accepts either bare codes ("n") or selectbox labels ("n - none") and keeps
+# only the code, one vectorized string op per column
+def parse_codes(df, features=FEATURES):
+    import pandas as pd
+
+    missing = [col for col in features if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    return pd.DataFrame({
+        col: df[col].astype(str).str.split(" - ", n=1).str[0].str.strip().str.lower()
+        for col in features
+    }, index=df.index)
+
+
+# Rows whose every value is a category the encoder knows; the rest can't
+# be encoded and get no prediction instead of failing their chunk
+def known_rows(X, encoder):
+    mask = np.ones(len(X), dtype=bool)
+    for col, categories in zip(X.columns, encoder.categories_):
+        mask &= X[col].isin(categories).to_numpy()
+    return mask
+
+
+# =====================
+# 🔮 Chunked Prediction
+# =====================
+# Yields (rows done, prediction Series for the chunk) so callers can
+# report progress and show partial results while the rest is predicted
+def predict_in_chunks(predict, X, encoder, chunk_size=CHUNK_SIZE):
+    import pandas as pd
+
+    known = known_rows(X, encoder)
+    for start in range(0, len(X), chunk_size):
+        chunk = X.iloc[start:start + chunk_size]
+        chunk_known = known[start:start + chunk_size]
+
+        preds = pd.Series(pd.NA, index=chunk.index, dtype=object)
+        if chunk_known.any():
+            preds[chunk_known] = predict(chunk[chunk_known])
+        yield start + len(chunk), preds
+
+
+# load_predictor() -> (predict, encoder, model_key), or None while the model
+# is not ready, is only called once a file is uploaded, so the page never
+# loads a model just to render the uploader. It may raise if the model
+# cannot be loaded. Results are kept in the session per (uploaded file, model_key),
+# so reruns caused by other widgets reuse them instead of predicting again.
+def batch_prediction_ui(load_predictor, key="batch"):
+    st.subheader("Batch prediction")
+    uploaded_file = st.file_uploader(
+        "Upload a CSV or Parquet file with one specimen per row",
+        type=["csv", "parquet"], key=f"{key}_file",
+        help=f"Columns: {', '.join(FEATURES)}. Values may be codes ('n') or labels ('n - none').")
+    if uploaded_file is None:
+        st.session_state.pop(f"{key}_results", None)
+        return
+
+    try:
+        predictor = load_predictor()
+    except Exception as e:
+        st.error(f"❌ The model could not be loaded. {e}")
+        return
+    if predictor is None:
+        st.warning("⏳ The model is still training. Please try again in a moment.")
+        return
+    predict, encoder, model_key = predictor
+
+    results_key = (uploaded_file.file_id, model_key)
+    cached = st.session_state.get(f"{key}_results")
+    if cached is None or cached[0] != results_key:
+        try:
+            results = predict_file(uploaded_file, predict, encoder)
+        except ValueError as e:
+            st.error(f"❌ Could not read the file. {e}")
+            return
+        cached = st.session_state[f"{key}_results"] = (results_key, results)
+    else:
+        st.dataframe(cached[1].head(100))
+    results = cached[1]
+
+    unknown = int(results['prediction'].isna().sum())
+    if unknown:
+        st.warning(f"{unknown:,} rows contain values the model does not know and were not predicted.")
+
+    # Encoded only when the button is clicked
+    st.download_button("⬇️ Download predictions", lambda: results.to_csv(index=False),
+                       file_name="mushroom_predictions.csv", mime="text/csv", key=f"{key}_download")
+
+
+# Reads, parses and predicts the whole file, showing progress and the first
+# rows as chunks finish; raises ValueError for an unreadable file
+def predict_file(uploaded_file, predict, encoder):
+    import pandas as pd
+
+    specimens = read_specimens(uploaded_file)
+    X = parse_codes(specimens)
+
+    progress = st.progress(0.0, text="Predicting...")
+    preview = st.empty()
+    parts = []
+    for done, preds in predict_in_chunks(predict, X, encoder):
+        parts.append(preds)
+        progress.progress(done / max(len(X), 1), text=f"Predicted {done:,} of {len(X):,} rows")
+        preview.dataframe(specimens.loc[preds.index[:100]].assign(prediction=preds[:100]))
+
+    return specimens.assign(prediction=pd.concat(parts) if parts else pd.Series(dtype=object))
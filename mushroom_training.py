@@ -0,0 +1,312 @@
+import os
+import glob
+import time
+import queue
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from disk_cache import FileLock
+from model_artifacts import ARTIFACT_DIR, artifact_key, artifact_path, file_sha256, load_artifact, save_artifact
+
+# Bump whenever read_data / encode_data change what they produce, so cached
+# intermediates and saved artifacts built by the old code are not reused
+TRANSFORM_VERSION = 2
+
+# =====================
+# 🍄 Training Pipeline
+# =====================
+# Plain (uncached) functions so they can run inside a worker process.
+# None of them modify the frames they are given: results are cached and
+# shared by fingerprint, so every frame is treated as immutable.
+
+def read_data(path, cols):
+    import pandas as pd
+
+    df = pd.read_csv(path, usecols=cols)
+    df = df[cols]
+
+    return df
+
+def get_target_encoder(data):
+    from sklearn.preprocessing import LabelEncoder
+
+    le = LabelEncoder()
+    le.fit(data['class'])
+
+    return le
+
+def get_features_encoder(data):
+    from sklearn.preprocessing import OrdinalEncoder
+
+    oe = OrdinalEncoder()
+    X_cols = data.columns[1:]
+    oe.fit(data[X_cols])
+
+    return oe
+
+# Builds a new encoded frame instead of overwriting the input's columns
+def encode_data(data, X_encoder, y_encoder):
+    import pandas as pd
+
+    X_cols = data.columns[1:]
+    encoded = pd.DataFrame(X_encoder.transform(data[X_cols]), columns=X_cols, index=data.index)
+    encoded.insert(0, 'class', y_encoder.transform(data['class']))
+
+    return encoded
+
+def train_model(data, params, monitor=None):
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    X = data.iloc[:, 1:]
+    y = data['class']
+
+    gbc = GradientBoostingClassifier(**params)
+
+    gbc.fit(X, y, monitor=monitor)
+
+    return gbc
+
+
+def model_key(path, cols, params):
+    return artifact_key(path, {"cols": list(cols), "gbc": params, "transform": TRANSFORM_VERSION})
+
+
+# =====================
+# 🔑 Fingerprint Cache
+# =====================
+# Intermediate results keyed by (stage, file hash + transform version,
+# columns) instead of by hashing the DataFrames that flow between stages.
+# The file hash is memoized on (path, size, mtime), so a fingerprint costs
+# a stat() once the file has been read. Time spent fingerprinting and
+# computing is recorded per stage.
+def data_fingerprint(path, cols):
+    return (file_sha256(path), TRANSFORM_VERSION, tuple(cols))
+
+
+class FingerprintCache:
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fingerprint(self, path, cols, timings=None):
+        started = time.perf_counter()
+        fingerprint = data_fingerprint(path, cols)
+        if timings is not None:
+            timings["fingerprint"] = timings.get("fingerprint", 0.0) + time.perf_counter() - started
+        return fingerprint
+
+    def get(self, stage, fingerprint, compute, timings=None):
+        key = (stage, fingerprint)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                if timings is not None:
+                    timings.setdefault(stage, 0.0)
+                return self._entries[key]
+
+        started = time.perf_counter()
+        value = compute()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+# One per process (the training worker keeps its own across fits)
+stage_cache = FingerprintCache()
+
+
+# Read + encoders + encoded frame for a data file, each computed once per
+# fingerprint; timings (seconds per stage, 0.0 on a cache hit) is filled in
+def prepare_data(path, cols, timings=None):
+    fingerprint = stage_cache.fingerprint(path, cols, timings)
+    df = stage_cache.get("read_data", fingerprint, lambda: read_data(path, cols), timings)
+    le = stage_cache.get("target_encoder", fingerprint, lambda: get_target_encoder(df), timings)
+    oe = stage_cache.get("features_encoder", fingerprint, lambda: get_features_encoder(df), timings)
+    encoded_df = stage_cache.get("encode_data", fingerprint, lambda: encode_data(df, oe, le), timings)
+    return le, oe, encoded_df
+
+
+# Full fit for one artifact key; saves the artifact before returning it
+# Runs under a per-key lock shared by every server process on the host: when
+# several cold workers ask for the same model, one trains and the rest wait
+# and then load its artifact
+def train_bundle(key, path, cols, params):
+    with FileLock(artifact_path(key) + ".lock"):
+        bundle = load_artifact(key)
+        if bundle is not None:
+            return bundle
+        return _train_bundle(key, path, cols, params)
+
+def _train_bundle(key, path, cols, params):
+    timings = {}
+    le, oe, encoded_df = prepare_data(path, cols, timings)
+
+    started = time.perf_counter()
+    gbc = train_model(encoded_df, params, monitor=_progress_monitor(key))
+    timings["train_model"] = time.perf_counter() - started
+
+    bundle = {"target_encoder": le, "features_encoder": oe, "model": gbc, "timings": timings}
+    save_artifact(key, bundle, metadata={"path": path, "cols": list(cols), "gbc": params})
+    return bundle
+
+
+# =====================
+# 📡 Worker Progress
+# =====================
+# Each worker gets the parent's queue through the pool initializer and
+# reports (key, stages done, total stages) after every boosting stage.
+_progress_queue = None
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+def _progress_monitor(key):
+    def monitor(i, estimator, _locals):
+        if _progress_queue is not None:
+            _progress_queue.put((key, i + 1, estimator.n_estimators))
+        return False
+    return monitor
+
+
+# Newest artifact on disk, whatever its key; used as the last good model
+def latest_artifact(artifact_dir=ARTIFACT_DIR):
+    paths = sorted(glob.glob(os.path.join(artifact_dir, "*.joblib")), key=os.path.getmtime, reverse=True)
+    for artifact in paths:
+        key = os.path.splitext(os.path.basename(artifact))[0]
+        bundle = load_artifact(key, artifact_dir)
+        if bundle is not None:
+            return key, bundle
+    return None, None
+
+
+# =====================
+# 🔁 Background Trainer
+# =====================
+# Process-wide holder of the current model. get() never blocks on a fit:
+# it returns the bundle for the requested key when it is ready, otherwise
+# it starts (at most one) training job in a process pool and returns the
+# last good bundle, or None if there has never been one. Finished models
+# are swapped in with a single assignment under the lock.
+#
+# A failed fit is kept in errors (see failure()) and not retried until a
+# backoff has passed: RETRY_BACKOFF seconds after the first failure,
+# doubling with each further failure up to RETRY_BACKOFF_MAX. A worker that
+# dies (e.g. killed for memory) breaks the whole pool; that counts as a
+# failed fit, and the pool is replaced before the next attempt.
+RETRY_BACKOFF = 30
+RETRY_BACKOFF_MAX = 600
+
+class BackgroundTrainer:
+    def __init__(self, max_workers=1):
+        self._context = multiprocessing.get_context("spawn")
+        self._max_workers = max_workers
+        self._progress_queue = self._context.Queue()
+        self._executor = self._new_executor()
+        self._broken = False
+        # Reentrant: replacing the pool cancels its queued jobs, whose
+        # _finish callbacks run right away in the replacing thread
+        self._lock = threading.RLock()
+        self._jobs = {}
+        self._progress = {}
+        # key -> (exception, time.monotonic() of the failure, failures in a row)
+        self.errors = {}
+        self.current_key, self.current = latest_artifact()
+
+    # Returns (key of the bundle served, bundle, whether it matches the request)
+    def get(self, path, cols, params):
+        key = model_key(path, cols, params)
+        with self._lock:
+            if key == self.current_key:
+                return key, self.current, True
+
+            bundle = load_artifact(key)
+            if bundle is not None:
+                self.current_key, self.current = key, bundle
+                return key, bundle, True
+
+            if key not in self._jobs and self._retry_in(key) == 0:
+                if self._broken:
+                    self._replace_executor()
+                try:
+                    future = self._executor.submit(train_bundle, key, path, list(cols), params)
+                except BrokenProcessPool as e:
+                    self._replace_executor()
+                    self._record_failure(key, e)
+                else:
+                    future.add_done_callback(lambda f, key=key: self._finish(key, f))
+                    self._jobs[key] = future
+            return self.current_key, self.current, False
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self._max_workers, mp_context=self._context,
+                                   initializer=_init_worker, initargs=(self._progress_queue,))
+
+    # Called under the lock
+    def _replace_executor(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._new_executor()
+        self._broken = False
+
+    def _record_failure(self, key, error):
+        failures = self.errors[key][2] + 1 if key in self.errors else 1
+        self.errors[key] = (error, time.monotonic(), failures)
+
+    def _retry_in(self, key):
+        if key not in self.errors:
+            return 0.0
+        _, failed_at, failures = self.errors[key]
+        backoff = min(RETRY_BACKOFF * 2 ** (failures - 1), RETRY_BACKOFF_MAX)
+        return max(0.0, failed_at + backoff - time.monotonic())
+
+    # (exception, seconds until the next attempt) if the last fit for the
+    # requested model failed, else None
+    def failure(self, path, cols, params):
+        key = model_key(path, cols, params)
+        with self._lock:
+            if key not in self.errors:
+                return None
+            return self.errors[key][0], self._retry_in(key)
+
+    def is_training(self):
+        return bool(self._jobs)
+
+    # Fraction of boosting stages done for each running job
+    def progress(self):
+        while True:
+            try:
+                key, done, total = self._progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._progress[key] = done / total
+        return {key: self._progress.get(key, 0.0) for key in self._jobs}
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._jobs.pop(key, None)
+            self._progress.pop(key, None)
+            # Cancelled by shutdown() or by replacing a broken pool
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                # Replaced on the next get(), not from this callback, which
+                # runs on the broken pool's own thread
+                if isinstance(error, BrokenProcessPool):
+                    self._broken = True
+                self._record_failure(key, error)
+                return
+            self.errors.pop(key, None)
+            self.current_key, self.current = key, future.result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,216 @@
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# =====================
+# 🖼️ Rendered-Chart Cache
+# =====================
+# Stores finished PNG/SVG bytes keyed by whatever identifies a chart
+# (e.g. target, start, end, regions). Least recently used entries are
+# evicted once either max_entries or max_bytes is exceeded.
+class RenderCache:
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_held = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        # A single chart larger than the whole budget is served but not kept
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes_held -= len(old)
+            self._entries[key] = data
+            self.bytes_held += len(data)
+            while len(self._entries) > self.max_entries or self.bytes_held > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes_held -= len(evicted)
+
+    # Cached bytes for key, rendering them with render() only on a miss
+    def get_or_render(self, key, render):
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.bytes_held
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_held = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_held,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Draws a chart with draw(fig, ax) and returns the encoded image bytes.
+# The figure is always closed, so pyplot never accumulates open figures.
+# pyplot is imported on the first render, so cached charts never load it.
+def render_figure(draw, fmt="png", dpi=100):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    try:
+        draw(fig, ax)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+# =====================
+# 📉 Downsampling
+# =====================
+# Largest-Triangle-Three-Buckets: keeps the first and last point and, from
+# each bucket in between, the point forming the largest triangle with the
+# previously kept point and the average of the next bucket. Returns the
+# positions to keep, so callers can index any aligned column (e.g. labels).
+def lttb_indices(y, max_points):
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if max_points is None or n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < edges.size else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+# Min/max bucketing: the lowest and highest point of each bucket, in order.
+# Cheaper than LTTB and never drops a peak, at the cost of a busier line.
+def minmax_indices(y, max_points):
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    if max_points is None or n <= max_points or max_points < 4:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, max_points // 2 + 1).astype(np.int64)
+    selected = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        bucket = y[start:end]
+        selected.append(start + int(np.argmin(bucket)))
+        selected.append(start + int(np.argmax(bucket)))
+    return np.unique(selected)
+
+
+DOWNSAMPLERS = {"lttb": lttb_indices, "minmax": minmax_indices}
+
+# Positions to plot for one series, capped at max_points (None = everything)
+def downsample_indices(y, max_points, method="lttb"):
+    return DOWNSAMPLERS[method](y, max_points)
+
+
+# Plots one series against its row positions, downsampled to max_points.
+# Plotting positions (not labels) keeps several downsampled series aligned.
+def plot_downsampled(ax, values, max_points=None, method="lttb", **kwargs):
+    values = np.asarray(values)
+    keep = downsample_indices(values, max_points, method)
+    return ax.plot(keep, values[keep], **kwargs)
+
+
+# =====================
+# 📏 Benchmark
+# =====================
+# python population_charts.py
+# Renders the same charts on every rerun, bypassing the cache, once through
+# render_figure and once with a copy that never closes its figure. Prints
+# current RSS (not the peak, which can only grow) and the open figure count:
+# render_figure should stay flat while the leaky copy keeps climbing. A
+# pass through RenderCache in between shows what a cache hit costs instead.
+if __name__ == "__main__":
+    import os
+    import time
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.rcParams["figure.max_open_warning"] = 0
+
+    # Linux only; None elsewhere
+    def current_rss_mb():
+        try:
+            with open("/proc/self/statm") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+        except OSError:
+            return None
+
+    def draw_series(seed):
+        def draw(fig, ax):
+            values = np.random.default_rng(seed).integers(0, 1000, 128)
+            ax.plot(np.arange(values.size), values, marker='o')
+            ax.set_title(f"Series {seed}")
+        return draw
+
+    # render_figure without the plt.close
+    def render_figure_unclosed(draw, fmt="png", dpi=100):
+        fig, ax = plt.subplots()
+        draw(fig, ax)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+        return buffer.getvalue()
+
+    def run(label, render, reruns=60):
+        print(label)
+        for rerun in range(1, reruns + 1):
+            started = time.perf_counter()
+            for seed in range(5):
+                render(seed)
+            elapsed = (time.perf_counter() - started) * 1000
+            if rerun in (1, 2, 10, 30, reruns):
+                rss = current_rss_mb()
+                rss = "n/a" if rss is None else f"{rss:.1f} MB"
+                print(f"  rerun {rerun:>3}: {elapsed:7.2f} ms, RSS {rss}, open figures {len(plt.get_fignums())}")
+
+    run("render_figure (closes figures)", lambda seed: render_figure(draw_series(seed)))
+
+    cache = RenderCache()
+    run("RenderCache hits", lambda seed: cache.get_or_render(("bench", seed),
+                                                             lambda: render_figure(draw_series(seed))))
+    print(f"  cache {cache.stats()}")
+
+    run("without plt.close", lambda seed: render_figure_unclosed(draw_series(seed)))
+    plt.close("all")
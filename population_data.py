@@ -0,0 +1,333 @@
+import os
+import io
+import json
+import time
+import threading
+import urllib.request
+import urllib.error
+
+import numpy as np
+import pandas as pd
+
+# =====================
+# 🔗 Dataset Sources
+# =====================
+# Public dataset URL from GitHub (can be pointed elsewhere, e.g. a local server)
+URL = os.environ.get(
+    "POPULATION_DATA_URL",
+    "https://raw.githubusercontent.com/marcopeix/MachineLearningModelDeploymentwithStreamlit/master/12_dashboard_capstone/data/quarterly_canada_population.csv",
+)
+
+# Copy shipped with the repo, used until the first refresh lands
+LOCAL_PATH = "data/quarterly_canada_population.csv"
+
+# Last snapshot downloaded from URL plus its validators (ETag / Last-Modified)
+CACHE_DIR = ".cache"
+CACHE_PATH = os.path.join(CACHE_DIR, "quarterly_canada_population.csv")
+META_PATH = CACHE_PATH + ".meta.json"
+
+# Correct dtypes for better memory performance
+DTYPES = {
+    'Quarter': str,
+    'Canada': np.int32,
+    'Newfoundland and Labrador': np.int32,
+    'Prince Edward Island': np.int32,
+    'Nova Scotia': np.int32,
+    'New Brunswick': np.int32,
+    'Quebec': np.int32,
+    'Ontario': np.int32,
+    'Manitoba': np.int32,
+    'Saskatchewan': np.int32,
+    'Alberta': np.int32,
+    'British Columbia': np.int32,
+    'Yukon': np.int32,
+    'Northwest Territories': np.int32,
+    'Nunavut': np.int32
+}
+
+
+def parse_population_csv(source):
+    return pd.read_csv(source, dtype=DTYPES)
+
+
+# Raises ValueError unless df has every expected column
+def check_population_frame(df):
+    missing = [col for col in DTYPES if col not in df.columns]
+    if missing:
+        raise ValueError(f"Population data is missing columns: {', '.join(missing)}")
+
+
+# =====================
+# 🗂️ Quarter Index
+# =====================
+QUARTER_OFFSETS = {"Q1": 0, "Q2": 1, "Q3": 2, "Q4": 3}
+
+# Converts date string like 'Q3 2020' to an integer ordinal (year * 4 + quarter)
+def quarter_ordinal(label):
+    quarter, year = label.split()
+    return int(year) * 4 + QUARTER_OFFSETS[quarter]
+
+
+# Built once per snapshot: maps every "Qn YYYY" label to its ordinal and row
+# position so validation, ordering checks and slicing are dict lookups
+# instead of scans over the Quarter column.
+class QuarterIndex:
+    def __init__(self, quarters):
+        self.labels = list(quarters)
+        self.positions = {label: i for i, label in enumerate(self.labels)}
+        self.ordinals = {label: quarter_ordinal(label) for label in self.labels}
+
+    def __contains__(self, label):
+        return label in self.positions
+
+    def __len__(self):
+        return len(self.labels)
+
+    def position(self, label):
+        return self.positions[label]
+
+    def ordinal(self, label):
+        ordinal = self.ordinals.get(label)
+        return quarter_ordinal(label) if ordinal is None else ordinal
+
+    def end_before_start(self, start, end):
+        return self.ordinal(start) > self.ordinal(end)
+
+    # Row slice covering start..end inclusive, for df.iloc
+    def slice(self, start, end):
+        return slice(self.positions[start], self.positions[end] + 1)
+
+
+# =====================
+# 📐 Population Change Cube
+# =====================
+# Population table held as a (quarters x regions) float64 array, so
+# percentage change, absolute change and CAGR for any (region, start, end)
+# are two array reads. batch() answers arrays of such queries in one
+# vectorized pass with no per-cell pandas indexing.
+class PopulationChangeCube:
+    def __init__(self, df, quarter_index):
+        self.quarter_index = quarter_index
+        self.regions = list(df.columns[1:])
+        self.region_positions = {region: i for i, region in enumerate(self.regions)}
+        self.values = df[self.regions].to_numpy(dtype=np.float64)
+        self.ordinals = np.array([quarter_index.ordinals[label] for label in quarter_index.labels])
+
+    # Labels -> row/column positions; integer inputs are taken as positions already
+    def _rows(self, quarters):
+        quarters = np.asarray(quarters)
+        if quarters.dtype.kind in "iu":
+            return quarters
+        return np.array([self.quarter_index.positions[q] for q in quarters.ravel()]).reshape(quarters.shape)
+
+    def _cols(self, regions):
+        regions = np.asarray(regions)
+        if regions.dtype.kind in "iu":
+            return regions
+        return np.array([self.region_positions[r] for r in regions.ravel()]).reshape(regions.shape)
+
+    def batch(self, regions, starts, ends):
+        cols = self._cols(regions)
+        start_rows = self._rows(starts)
+        end_rows = self._rows(ends)
+
+        initial = self.values[start_rows, cols]
+        final = self.values[end_rows, cols]
+        years = (self.ordinals[end_rows] - self.ordinals[start_rows]) / 4
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent = (final - initial) / initial * 100
+            cagr = np.where(years > 0, (np.power(final / initial, 1 / years) - 1) * 100, np.nan)
+
+        return {
+            "initial": initial,
+            "final": final,
+            "absolute": final - initial,
+            "percent": percent,
+            "cagr": cagr,
+        }
+
+    def change(self, region, start, end):
+        result = self.batch([region], [start], [end])
+        return {name: values[0].item() for name, values in result.items()}
+
+    # Every region for one quarter pair, ready for a comparison table or export
+    def table(self, start, end, regions=None):
+        regions = self.regions if regions is None else list(regions)
+        result = self.batch(regions, [start] * len(regions), [end] * len(regions))
+        return pd.DataFrame(result, index=pd.Index(regions, name="Region"))
+
+
+# A loaded dataset and everything derived from it; replaced as a whole on refresh
+class PopulationSnapshot:
+    def __init__(self, df, version):
+        self.df = df
+        self.version = version
+        self.quarters = QuarterIndex(df['Quarter'])
+        self.changes = PopulationChangeCube(df, self.quarters)
+
+
+# =====================
+# 🔄 Stale-While-Revalidate Loader
+# =====================
+# Serves the newest snapshot it has (cache, then local copy) straight away and
+# revalidates against URL on a background thread once the snapshot is older
+# than max_age seconds. Only the very first load, with nothing on disk, waits
+# on the network.
+class PopulationLoader:
+    def __init__(self, url=URL, local_path=LOCAL_PATH, cache_path=CACHE_PATH,
+                 max_age=3600, timeout=10):
+        self.url = url
+        self.local_path = local_path
+        self.cache_path = cache_path
+        self.meta_path = cache_path + ".meta.json"
+        self.max_age = max_age
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._snapshot = None
+        self._meta = {}
+        # Bumped on every swap so derived caches (e.g. rendered charts) can key on it
+        self.version = 0
+        self.source = None
+        self.checked_at = 0.0
+        self.last_error = None
+
+    def __sizeof__(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return object.__sizeof__(self)
+        return object.__sizeof__(self) + int(snapshot.df.memory_usage(deep=True).sum()) + snapshot.changes.values.nbytes
+
+    # ---------- public API ----------
+    def get(self):
+        return self.snapshot().df
+
+    # Current PopulationSnapshot; df and its indexes are replaced together on refresh
+    def snapshot(self):
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load_initial()
+        if self.is_stale():
+            self.refresh_async()
+        return self._snapshot
+
+    def is_stale(self):
+        return time.time() - self.checked_at > self.max_age
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return self._refresh_thread
+            self._refresh_thread = threading.Thread(target=self.refresh, daemon=True,
+                                                    name="population-refresh")
+            self._refresh_thread.start()
+            return self._refresh_thread
+
+    # Conditional GET; returns True when a new snapshot was swapped in.
+    # Before the first snapshot(), validators come from the cache on disk.
+    def refresh(self):
+        meta = self._meta if self._snapshot is not None else self._read_meta()
+        request = urllib.request.Request(self.url)
+        if meta.get("etag"):
+            request.add_header("If-None-Match", meta["etag"])
+        if meta.get("last_modified"):
+            request.add_header("If-Modified-Since", meta["last_modified"])
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                self.checked_at = time.time()
+                self.last_error = None
+                return False
+            self._record_failure(e)
+            return False
+        except Exception as e:
+            self._record_failure(e)
+            return False
+
+        # A body that does not parse into a complete snapshot is a failed
+        # refresh: the cache and the served snapshot are left as they were
+        try:
+            df = parse_population_csv(io.BytesIO(body))
+            check_population_frame(df)
+            snapshot = PopulationSnapshot(df, self.version + 1)
+        except Exception as e:
+            self._record_failure(e)
+            return False
+
+        meta = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "url": self.url,
+        }
+        self._write_cache(body, meta)
+
+        # Swap in the new snapshot in one assignment so readers never see a mix
+        self._swap(snapshot)
+        self._meta = meta
+        self.source = "remote"
+        self.checked_at = time.time()
+        self.last_error = None
+        return True
+
+    # ---------- internals ----------
+    def _swap(self, snapshot):
+        self._snapshot = snapshot
+        self.version = snapshot.version
+
+    def _set_snapshot(self, df):
+        check_population_frame(df)
+        self._swap(PopulationSnapshot(df, self.version + 1))
+
+    # A cache file that no longer loads is skipped in favour of the local copy
+    def _load_cache(self):
+        try:
+            self._set_snapshot(parse_population_csv(self.cache_path))
+        except Exception as e:
+            self.last_error = e
+            return False
+        self._meta = self._read_meta()
+        self.source = "cache"
+        self.checked_at = os.path.getmtime(self.meta_path) if os.path.exists(self.meta_path) else 0.0
+        return True
+
+    def _load_initial(self):
+        if os.path.exists(self.cache_path) and self._load_cache():
+            return
+        if os.path.exists(self.local_path):
+            self._set_snapshot(parse_population_csv(self.local_path))
+            self.source = "local"
+        elif not self.refresh():
+            raise RuntimeError(f"Could not load population data from {self.url}: {self.last_error}")
+
+    def _record_failure(self, error):
+        # Keep serving the current snapshot and retry after another max_age
+        self.last_error = error
+        self.checked_at = time.time()
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, body, meta):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        # Unique per writer, so concurrent refreshes never share a temp file
+        suffix = f"{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp"
+        tmp_path = f"{self.cache_path}.{suffix}"
+        with open(tmp_path, "wb") as file:
+            file.write(body)
+        os.replace(tmp_path, self.cache_path)
+
+        tmp_meta = f"{self.meta_path}.{suffix}"
+        with open(tmp_meta, "w") as file:
+            json.dump(meta, file)
+        os.replace(tmp_meta, self.meta_path)
@@ -0,0 +1,106 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+# =====================
+# 📬 Micro-Batching Prediction Service
+# =====================
+# One per server process, shared by every session. Sessions submit single
+# rows and get a Future back; a worker thread drains the queue into batches
+# of up to max_batch_size rows (waiting at most max_wait_ms after the first
+# row of a batch arrives) and makes one vectorized predict() call per batch.
+#
+# Batching only pays when one row costs more than the wait. A backend that
+# answers a row in O(1) (the lookup table in prediction_table.py) passes
+# predict_row instead: predict_one() then calls it in the caller's thread
+# and never queues, since a queued row would wait up to max_wait_ms for
+# nothing. submit() still queues, for callers that want a Future.
+class PredictionService:
+    def __init__(self, predict, max_batch_size=256, max_wait_ms=2.0, predict_row=None):
+        self.predict = predict
+        self.predict_row = predict_row
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._direct_requests = 0
+        self._batches = 0
+        self._max_batch = 0
+        self._last_batch = 0
+        self._max_queue_depth = 0
+        self._predict_seconds = 0.0
+        self._worker = threading.Thread(target=self._run, daemon=True, name="prediction-service")
+        self._worker.start()
+
+    def submit(self, row):
+        future = Future()
+        self._queue.put((row, future))
+        with self._lock:
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return future
+
+    def predict_one(self, row, timeout=None):
+        if self.predict_row is not None:
+            pred = self.predict_row(row)
+            with self._lock:
+                self._direct_requests += 1
+            return pred
+        return self.submit(row).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "direct_requests": self._direct_requests,
+                "batches": self._batches,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "last_batch_size": self._last_batch,
+                "max_batch_size": self._max_batch,
+                "predict_seconds": self._predict_seconds,
+            }
+
+    # ---------- worker ----------
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            rows = [row for row, _ in batch]
+            futures = [future for _, future in batch]
+
+            started = time.perf_counter()
+            try:
+                preds = self.predict(np.array(rows))
+            except Exception:
+                # One bad row (e.g. an unknown category) must not fail the
+                # others: retry one by one so each future gets its own outcome
+                for row, future in batch:
+                    try:
+                        future.set_result(self.predict(np.array([row]))[0])
+                    except Exception as e:
+                        future.set_exception(e)
+            else:
+                for future, pred in zip(futures, preds):
+                    future.set_result(pred)
+
+            with self._lock:
+                self._predict_seconds += time.perf_counter() - started
+                self._requests += len(batch)
+                self._batches += 1
+                self._last_batch = len(batch)
+                self._max_batch = max(self._max_batch, len(batch))
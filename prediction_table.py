@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from model_artifacts import file_sha256
+from tree_compiler import PIPE_PATH, encode_categories
+
+# =====================
+# 🧮 Exhaustive Prediction Table
+# =====================
+# The nine model inputs are categorical, so the whole input space is finite
+# (9*2*12*4*4*9*9*5*9 = 12.6M combinations of the categories the model was
+# fitted on). The build step below predicts every combination once and
+# stores one bit per combination ("is it classes[1]") in model/, indexed by
+# the mixed-radix number of the category codes (first feature most
+# significant). The app memory-maps the bits, so a prediction is one array
+# read with no model in memory.
+#
+# Selectbox values the model never saw (e.g. ring type "s"/"z") are not part
+# of the space: they raise ValueError, exactly like the pipeline does.
+#
+# Build (reproducible, verified against the live pipeline):
+#   python prediction_table.py [--workers N]
+TABLE_PATH = "model/gboost_lookup.bin"
+META_PATH = "model/gboost_lookup.json"
+
+# Multiple of 8 so each chunk packs into whole bytes
+CHUNK_SIZE = 1 << 20
+
+
+class PredictionTable:
+    def __init__(self, bits, meta):
+        self.bits = bits
+        self.meta = meta
+        self.feature_names = meta["feature_names"]
+        self.categories_ = [np.asarray(cats) for cats in meta["categories"]]
+        self.classes_ = np.asarray(meta["classes"])
+        self.sizes = [cats.size for cats in self.categories_]
+        self.radix = np.cumprod([1] + self.sizes[:0:-1])[::-1].astype(np.int64)
+        self._codes = [{cat: i for i, cat in enumerate(cats.tolist())} for cats in self.categories_]
+        self._radix = self.radix.tolist()
+
+    # Memory-mapped table for the given model file, or None when the table
+    # has not been built or was built from a different model
+    @classmethod
+    def load(cls, table_path=TABLE_PATH, meta_path=META_PATH, pipe_path=PIPE_PATH):
+        if not (os.path.exists(table_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path) as file:
+            meta = json.load(file)
+        if meta.get("source_sha") != file_sha256(pipe_path):
+            return None
+        bits = np.memmap(table_path, dtype=np.uint8, mode="r")
+        if bits.size != meta["n_bytes"]:
+            return None
+        return cls(bits, meta)
+
+    # The table is memory-mapped: this is address space, paged in on demand
+    def __sizeof__(self):
+        return object.__sizeof__(self) + self.bits.nbytes
+
+    def _lookup(self, index):
+        return (self.bits[index >> 3] >> (7 - (index & 7))) & 1
+
+    def predict_one(self, values):
+        index = 0
+        for j, value in enumerate(values):
+            code = self._codes[j].get(value)
+            if code is None:
+                raise ValueError(f"Found unknown categories ['{value}'] in column {j} during transform")
+            index += code * self._radix[j]
+        return self.classes_[int(self._lookup(index))]
+
+    def predict(self, X):
+        index = encode_categories(X, self.categories_).astype(np.int64) @ self.radix
+        return self.classes_[self._lookup(index).astype(np.intp)]
+
+
+# =====================
+# 🏗️ Build
+# =====================
+# Workers load the pipeline once and predict whole chunks of the space,
+# feeding the ordinal codes straight to the fitted classifier
+_classifier = None
+
+def _init_build_worker(pipe_path):
+    global _classifier
+    from joblib import load
+
+    _classifier = load(pipe_path).named_steps["gbc"]
+
+def _predict_chunk(start, stop, sizes):
+    index = np.arange(start, stop, dtype=np.int64)
+    codes = np.column_stack(np.unravel_index(index, sizes)).astype(np.float64)
+    preds = _classifier.predict(codes)
+    return np.packbits(preds == _classifier.classes_[1])
+
+
+def build_table(pipe_path=PIPE_PATH, table_path=TABLE_PATH, meta_path=META_PATH,
+                chunk_size=CHUNK_SIZE, workers=None):
+    from joblib import load
+
+    pipe = load(pipe_path)
+    encoder = pipe.named_steps["encoder"]
+    classes = pipe.named_steps["gbc"].classes_
+    if len(classes) != 2:
+        raise ValueError("Only binary classifiers fit in a one-bit table")
+
+    sizes = [len(cats) for cats in encoder.categories_]
+    total = int(np.prod(sizes))
+    n_bytes = (total + 7) // 8
+
+    tmp_path = f"{table_path}.{os.getpid()}.tmp"
+    table = np.memmap(tmp_path, dtype=np.uint8, mode="w+", shape=(n_bytes,))
+    starts = list(range(0, total, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_build_worker,
+                             initargs=(pipe_path,)) as executor:
+        chunks = executor.map(_predict_chunk, starts,
+                              [min(start + chunk_size, total) for start in starts],
+                              [sizes] * len(starts))
+        for start, packed in zip(starts, chunks):
+            table[start // 8:start // 8 + packed.size] = packed
+    table.flush()
+    digest = hashlib.sha256(np.asarray(table).tobytes()).hexdigest()
+    del table
+    os.replace(tmp_path, table_path)
+
+    meta = {
+        "source_sha": file_sha256(pipe_path),
+        "feature_names": [str(name) for name in encoder.feature_names_in_],
+        "categories": [[str(cat) for cat in cats] for cats in encoder.categories_],
+        "classes": [str(cls) for cls in classes],
+        "n_combinations": total,
+        "n_bytes": n_bytes,
+        "bit_order": "big",
+        "table_sha256": digest,
+    }
+    with open(meta_path, "w") as file:
+        json.dump(meta, file, indent=2)
+    return meta
+
+
+# Compares the table with pipe.predict on random rows of the space
+def verify_table(table, pipe, n_samples=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.choice(cats, n_samples) for cats in table.categories_])
+    return int((table.predict(X) != pipe.predict(X)).sum())
+
+
+if __name__ == "__main__":
+    import argparse
+    import warnings
+
+    from joblib import load
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    parser = argparse.ArgumentParser(description="Build the exhaustive mushroom prediction table")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--samples", type=int, default=200_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    meta = build_table(workers=args.workers)
+    print(f"Built {meta['n_combinations']:,} predictions ({meta['n_bytes']:,} bytes) "
+          f"in {time.perf_counter() - started:.1f} s, sha256 {meta['table_sha256'][:16]}")
+
+    table = PredictionTable.load()
+    mismatches = verify_table(table, load(PIPE_PATH), n_samples=args.samples)
+    print(f"Verified {args.samples:,} random combinations against the pipeline: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit("Prediction table does not match the pipeline")
@@ -0,0 +1,112 @@
+import time
+import queue
+import threading
+from contextlib import contextmanager
+
+# =====================
+# 🏊 Supabase Client Pool
+# =====================
+# One per server process, shared by every session. Holds up to `size`
+# Supabase clients; each keeps its own keep-alive HTTP connections, so
+# sessions reuse open sockets and TLS sessions instead of paying for a new
+# client each time they connect. A session borrows a client for one
+# operation and gives it back:
+#
+#   with pool.borrow() as client:
+#       client.table(...).select(...).execute()
+#
+# At most `size` operations run at once; further borrowers wait (up to
+# `timeout` seconds). A client idle for longer than health_check_interval,
+# or one whose last operation raised, is checked with a one-row query
+# before it is lent out again, and replaced if that fails.
+class SupabasePool:
+    def __init__(self, url, key, size=4, health_check_interval=30.0, timeout=30.0,
+                 table="car_parts_monthly_sales", create_client=None):
+        self.url = url
+        self.key = key
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.table = table
+        self._create_client = create_client
+        # LIFO, so the most recently used (warmest) client is lent first
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._discarded = 0
+        self._borrows = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+
+    def _new_client(self):
+        create_client = self._create_client
+        if create_client is None:
+            from supabase import create_client
+        client = create_client(self.url, self.key)
+        with self._lock:
+            self._created += 1
+        return client
+
+    def is_healthy(self, client):
+        try:
+            client.table(self.table).select("id").limit(1).execute()
+            return True
+        except Exception:
+            return False
+
+    def _checkout(self):
+        while True:
+            try:
+                client, last_used, failed = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_client()
+            if failed or time.monotonic() - last_used > self.health_check_interval:
+                if not self.is_healthy(client):
+                    with self._lock:
+                        self._discarded += 1
+                    continue
+            return client
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            if not self._slots.acquire(timeout=timeout):
+                raise TimeoutError(f"No Supabase connection free after {timeout} s")
+        with self._lock:
+            self._borrows += 1
+            self._wait_seconds += time.perf_counter() - started
+
+        failed = False
+        try:
+            client = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        try:
+            yield client
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._idle.put((client, time.monotonic(), failed))
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "size": self.size,
+                "clients": self._created - self._discarded,
+                "idle": idle,
+                "in_use": self._created - self._discarded - idle,
+                "created": self._created,
+                "discarded": self._discarded,
+                "borrows": self._borrows,
+                "waits": self._waits,
+                "mean_wait_ms": self._wait_seconds / self._borrows * 1000 if self._borrows else 0.0,
+            }
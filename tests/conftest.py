@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The apps' modules live at the repo root, next to the scripts
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,65 @@
+import pytest
+
+import cache_inspector
+from cache_inspector import cached_data, render_cache_inspector
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    policy = {"ttl": None, "max_entries": 100, "max_bytes": None, "shared": False}
+    monkeypatch.setattr(cache_inspector, "policy_for", lambda name, path=None: dict(policy))
+    return policy
+
+
+def make_cached(name):
+    computed = []
+
+    def compute(_model, x):
+        computed.append(x)
+        return bytes(1000)
+
+    return cached_data(compute, name=name), computed
+
+
+def test_max_bytes_evicts_least_recently_used_entries(policy):
+    # Room for three ~1 KB entries
+    policy["max_bytes"] = 3500
+    func, computed = make_cached("test_cache_inspector.lru")
+    model = object()
+
+    for x in (0, 1, 2, 0, 3):
+        func(model, x)
+    assert computed == [0, 1, 2, 3]
+    assert func.stats.evictions == 1
+    assert func.stats.clears == 0
+
+    # 1 was evicted, 0 was kept because it had just been used
+    func(model, 0)
+    func(model, 1)
+    assert computed == [0, 1, 2, 3, 1]
+    report = func.stats.report()
+    assert report["entries"] == 3 and report["bytes"] <= 3500
+    # Evicting does not keep the underscore argument alive
+    assert all(args[0] is None for _, _, (args, _) in func.stats._entries.values())
+    func.clear()
+
+
+def test_without_max_bytes_nothing_is_evicted(policy):
+    func, computed = make_cached("test_cache_inspector.unbounded")
+    for x in range(10):
+        func(None, x)
+    assert func.stats.evictions == 0
+    assert func.stats.report()["entries"] == 10
+    func.clear()
+
+
+class Container:
+    def expander(self, label):
+        raise AssertionError("rendered")
+
+
+def test_inspector_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(cache_inspector, "SHOW_CACHE_INSPECTOR", False)
+    render_cache_inspector(Container())
+    with pytest.raises(AssertionError):
+        render_cache_inspector(Container(), enabled=True)
@@ -0,0 +1,363 @@
+import io
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from car_parts_data import (COLUMNS, EXPORT_FORMATS, LOCAL_PATH, FrameIndex, Rollups, SQLiteSource, SupabaseSource,
+                            TableMirror, export_file, filter_frame, frame_chunks, load_table, normalize_frame)
+from supabase_pool import SupabasePool
+
+
+# =====================
+# Stand-in for PostgREST
+# =====================
+# The query builder calls SupabaseSource makes, evaluated over a list of row
+# dicts the way PostgREST would: values compare by their stored type, so the
+# month/day/year text dates compare as strings. Enforces PostgREST's row cap.
+class Response:
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+
+class Query:
+    def __init__(self, table):
+        self.table = table
+        self.columns = None
+        self.count = None
+        self.conditions = []
+        self.order_by = None
+        self.n = None
+        self.negate = False
+
+    def select(self, columns, count=None):
+        self.columns = None if columns == "*" else columns.split(",")
+        self.count = count
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def _where(self, column, test):
+        negate, self.negate = self.negate, False
+        self.conditions.append(lambda row: row[column] is not None and test(row[column]) != negate)
+        return self
+
+    def gt(self, column, value):
+        return self._where(column, lambda v: v > value)
+
+    def gte(self, column, value):
+        return self._where(column, lambda v: v >= value)
+
+    def lte(self, column, value):
+        return self._where(column, lambda v: v <= value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._where(column, lambda v: v in values)
+
+    def order(self, column):
+        self.order_by = column
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def execute(self):
+        self.table.requests += 1
+        rows = [row for row in self.table.rows if all(test(row) for test in self.conditions)]
+        if self.order_by is not None:
+            rows.sort(key=lambda row: row[self.order_by])
+        count = len(rows) if self.count == "exact" else None
+        rows = rows[:min(self.n or self.table.max_rows, self.table.max_rows)]
+        if self.columns is not None:
+            rows = [{col: row[col] for col in self.columns} for row in rows]
+        return Response(rows, count)
+
+
+class StandInClient:
+    max_rows = 1000
+
+    def __init__(self, frame):
+        self.rows = frame.to_dict("records")
+        self.requests = 0
+
+    def table(self, name):
+        return Query(self)
+
+
+# The sample repeated to n_rows with unique ids, rows shuffled so ordering
+# by id is the stand-in's job. Dates stay month/day/year text, as stored.
+def make_table(n_rows=4500):
+    sample = pd.read_csv(LOCAL_PATH, encoding="utf-8-sig")
+    frame = pd.concat([sample] * (n_rows // len(sample) + 1), ignore_index=True).iloc[:n_rows]
+    frame["id"] = np.arange(1, n_rows + 1)
+    return frame.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def table():
+    return make_table()
+
+
+@pytest.fixture
+def client(table):
+    return StandInClient(table)
+
+
+@pytest.fixture
+def source(client):
+    return SupabaseSource(SupabasePool("http://stand-in", "key", create_client=lambda url, key: client))
+
+
+# Rows as PostgREST returns them: integers, month/day/year text, nulls
+def test_normalize_frame_dtypes_and_values():
+    raw = pd.DataFrame({
+        "id": [1, 2, 3, 40000],
+        "parts_id": [2674, 2670, None, 2674],
+        "date": ["1/1/1998", "12/1/2003", None, "2/29/2000"],
+        "volume": [0, 12, 127, -3],
+    })
+    df = normalize_frame(raw)
+
+    assert df["id"].dtype == np.int32
+    assert df["volume"].dtype == np.int8
+    assert isinstance(df["parts_id"].dtype, pd.CategoricalDtype)
+    assert df["date"].dtype == "datetime64[ns]"
+
+    assert df["id"].tolist() == [1, 2, 3, 40000]
+    assert df["volume"].tolist() == [0, 12, 127, -3]
+    assert df["parts_id"].tolist()[:2] == [2674.0, 2670.0] and pd.isna(df["parts_id"].iloc[2])
+    assert df["date"].tolist()[:2] == [pd.Timestamp("1998-01-01"), pd.Timestamp("2003-12-01")]
+    assert pd.isna(df["date"].iloc[2]) and df["date"].iloc[3] == pd.Timestamp("2000-02-29")
+    # Already normalized: unchanged
+    pd.testing.assert_frame_equal(normalize_frame(df), df)
+
+
+def test_normalize_frame_iso_dates_and_nullable_volume():
+    raw = pd.DataFrame({"date": ["2001-03-01", None], "volume": [2.0, None], "parts_id": ["2674", "2674"]})
+    df = normalize_frame(raw)
+
+    assert df["date"].tolist()[0] == pd.Timestamp("2001-03-01") and pd.isna(df["date"].iloc[1])
+    # A null keeps volume float, downcast as far as it goes
+    assert df["volume"].dtype == np.float32
+    assert df["volume"].iloc[0] == 2.0 and pd.isna(df["volume"].iloc[1])
+    assert df["parts_id"].cat.categories.tolist() == ["2674"]
+
+
+# What a load with these columns and filters should return
+def expected(table, columns=None, filters=()):
+    df = filter_frame(normalize_frame(table.sort_values("id")), filters)
+    return df[list(columns or COLUMNS)].reset_index(drop=True)
+
+
+def assert_same(got, want):
+    got = normalize_frame(got).reset_index(drop=True)
+    assert list(got.columns) == list(want.columns)
+    assert len(got) == len(want)
+    for col in want.columns:
+        assert got[col].astype(object).tolist() == want[col].astype(object).tolist(), col
+
+
+FILTERS = {
+    "range": [("volume", "between", (2, 10))],
+    "in": [("parts_id", "in", [2674, 2670])],
+    "not_in": [("parts_id", "not_in", [2674, 2670, 2668])],
+    "gt": [("id", "gt", 3000)],
+    "date": [("date", "between", (datetime.date(1999, 11, 1), datetime.date(2001, 2, 1)))],
+    "combined": [("date", "between", (pd.Timestamp("2000-01-01"), pd.Timestamp("2002-12-01"))),
+                 ("parts_id", "in", [2674, 2673]), ("volume", "between", (1, 6))],
+    "nothing": [("parts_id", "in", [])],
+}
+
+
+def test_paged_load_matches_table(client, table):
+    pages = []
+    df = load_table(client, page_size=700, on_page=lambda buffer, total: pages.append((buffer.size, total)))
+
+    assert_same(df, expected(table))
+    assert [size for size, _ in pages] == list(range(700, len(table), 700)) + [len(table)]
+    assert pages[0][1] == len(table)
+
+
+def test_page_size_beyond_row_cap_still_loads_everything(client, table):
+    assert_same(load_table(client, page_size=client.max_rows), expected(table))
+
+
+@pytest.mark.parametrize("columns", [["volume"], ["date", "parts_id"], ["id", "volume"]])
+def test_projected_load(source, table, columns):
+    assert_same(source.load(columns), expected(table, columns))
+
+
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_filtered_load_matches_pandas(source, table, name):
+    filters = FILTERS[name]
+    assert_same(source.load(filters=filters), expected(table, filters=filters))
+
+
+@pytest.mark.parametrize("name", ["date", "combined"])
+def test_date_filter_with_projection_excluding_date(source, table, name):
+    filters = FILTERS[name]
+    assert_same(source.load(["id", "volume"], filters), expected(table, ["id", "volume"], filters))
+
+
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_chunked_export_matches_load(source, table, name):
+    filters = FILTERS[name]
+    chunks = list(source.iter_chunks(["id", "parts_id", "volume"], filters, chunk_rows=1200))
+    assert chunks
+    assert_same(pd.concat(chunks, ignore_index=True), expected(table, ["id", "parts_id", "volume"], filters))
+
+
+@pytest.mark.parametrize("name", list(FILTERS))
+def test_sqlite_source_matches_supabase_source(source, table, name):
+    filters = FILTERS[name]
+    local = SQLiteSource(df=table)
+    assert_same(local.load(filters=filters), normalize_frame(source.load(filters=filters)))
+
+
+@pytest.fixture(scope="module")
+def frame(table):
+    return normalize_frame(table.sort_values("id")).reset_index(drop=True)
+
+
+# Integer columns with fractional bounds: FrameIndex rounds them to the
+# column's integers instead of comparing as floats
+FRACTIONAL_FILTERS = {
+    "between_fractions": [("volume", "between", (2.5, 9.5))],
+    "between_within_one": [("volume", "between", (3.2, 3.8))],
+    "gt_fraction": [("id", "gt", 2999.5)],
+    "gt_negative_fraction": [("volume", "gt", -0.5)],
+    "beyond_dtype": [("volume", "between", (-1e12, 1e12))],
+    "combined_fractions": [("volume", "between", (0.5, 6.01)), ("id", "gt", 100.7), ("parts_id", "in", [2674])],
+}
+
+
+@pytest.mark.parametrize("name", list(FILTERS) + list(FRACTIONAL_FILTERS))
+def test_frame_index_matches_filter_frame(frame, name):
+    filters = FILTERS.get(name) or FRACTIONAL_FILTERS[name]
+    index = FrameIndex(frame)
+    want = filter_frame(frame, filters).reset_index(drop=True)
+    assert_same(index.filter(filters), want)
+    # Cached sorted columns and groups give the same answer the second time
+    assert_same(index.filter(filters), want)
+    assert_same(index.filter(filters, frame[["id", "volume"]]), want[["id", "volume"]])
+
+
+def test_frame_index_filters_in_row_order(frame):
+    shuffled = frame.sample(frac=1, random_state=1).reset_index(drop=True)
+    filters = FILTERS["combined"]
+    assert (FrameIndex(shuffled).filter(filters).index == filter_frame(shuffled, filters).index).all()
+
+
+# SQLiteSource recording the filters of every load it serves
+class CountingSource(SQLiteSource):
+    def __init__(self, df):
+        super().__init__(df=df)
+        self.loads = []
+
+    def load(self, columns=None, filters=(), **kwargs):
+        self.loads.append(list(filters))
+        return super().load(columns, filters, **kwargs)
+
+
+# The sample as stored, split by id: the later ids bring parts the earlier
+# ones never had, so extending the rollups has to grow them
+@pytest.fixture
+def mirror_tables():
+    sample = pd.read_csv(LOCAL_PATH, encoding="utf-8-sig")
+    return sample[sample["id"] <= 180], sample
+
+
+def assert_same_rollups(got, want):
+    assert got.rows == want.rows
+    pd.testing.assert_frame_equal(got.part_month().sort_index(axis=1), want.part_month().sort_index(axis=1))
+    pd.testing.assert_frame_equal(got.part_year().sort_index(axis=1), want.part_year().sort_index(axis=1))
+    pd.testing.assert_series_equal(got.monthly_totals(), want.monthly_totals())
+    pd.testing.assert_series_equal(got.yearly_totals(), want.yearly_totals())
+
+
+def test_mirror_full_sync_then_fresh_reads(mirror_tables, tmp_path):
+    _, full = mirror_tables
+    source = CountingSource(full)
+    mirror = TableMirror(source, str(tmp_path / "mirror.parquet"), ttl=60)
+
+    df = mirror.get()
+    assert source.loads == [[]]
+    assert mirror.last_sync["mode"] == "full" and mirror.last_sync["rows_fetched"] == len(full)
+    assert_same(df, normalize_frame(full))
+
+    # Within the ttl: served from memory, or from the file by another process
+    assert mirror.get() is df
+    restarted = TableMirror(source, mirror.path, ttl=60)
+    assert_same(restarted.get(), normalize_frame(full))
+    assert restarted.last_sync is None
+    assert source.loads == [[]]
+
+
+def test_mirror_delta_sync_fetches_only_new_rows(mirror_tables, tmp_path):
+    first, full = mirror_tables
+    mirror = TableMirror(CountingSource(first), str(tmp_path / "mirror.parquet"), ttl=0)
+    mirror.get()
+    rollups = mirror.rollups()
+    extended_with = []
+    rollups.extended = lambda delta: extended_with.append(len(delta)) or Rollups.extended(rollups, delta)
+
+    # Rows appended upstream since
+    mirror.source = source = CountingSource(full)
+    df = mirror.get()
+    assert source.loads == [[("id", "gt", 180)]]
+    assert mirror.last_sync["mode"] == "delta" and mirror.last_sync["rows_fetched"] == len(full) - len(first)
+    assert_same(df, normalize_frame(full))
+    assert_same(pd.read_parquet(mirror.path), normalize_frame(full))
+
+    # The rollups were extended with the delta, not rebuilt; the old frame's
+    # are untouched for sessions still reading it
+    assert extended_with == [len(full) - len(first)]
+    assert_same_rollups(mirror.rollups(), Rollups(full))
+    assert_same_rollups(rollups, Rollups(first))
+
+    # Nothing new: another delta request, no rows
+    mirror.get()
+    assert source.loads[-1] == [("id", "gt", len(full))]
+    assert mirror.last_sync["rows_fetched"] == 0
+
+
+def test_rollups_extended_matches_rebuilt(table):
+    frame = table.sort_values("id")
+    base, delta = frame.iloc[:3000], frame.iloc[3000:]
+    rollups = Rollups(base)
+    extended = rollups.extended(delta)
+    assert_same_rollups(extended, Rollups(frame))
+    assert_same_rollups(rollups, Rollups(base))
+    assert list(extended.top_parts(3)) == list(Rollups(frame).top_parts(3))
+
+
+# The export as download_button's deferred download would serve it
+def served(data):
+    return convert_data_to_bytes_and_infer_mime(data, unsupported_error=TypeError(type(data)))[0]
+
+
+def read_export(data, fmt):
+    return pd.read_csv(io.BytesIO(data)) if fmt == "CSV" else pd.read_parquet(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("fmt", list(EXPORT_FORMATS))
+@pytest.mark.parametrize("name", ["range", "date", "nothing"])
+def test_export_round_trips_through_download_button(source, table, fmt, name):
+    columns, filters = ["id", "date", "volume"], FILTERS[name]
+    want = expected(table, columns, filters)
+
+    from_source = served(export_file(source.iter_chunks(columns, filters, chunk_rows=1200), fmt))
+    assert_same(read_export(from_source, fmt), want)
+
+    frame = filter_frame(normalize_frame(table.sort_values("id")), filters)
+    from_frame = served(export_file(frame_chunks(frame, columns, chunk_rows=1200), fmt))
+    assert_same(read_export(from_frame, fmt), want)
@@ -0,0 +1,48 @@
+import os
+import time
+
+from disk_cache import LOCK_STRIPES, DiskCache
+
+
+def cache_files(directory, suffix):
+    return [name for _, _, files in os.walk(directory) for name in files if name.endswith(suffix)]
+
+
+def test_prune_keeps_newest_entries_within_limits(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=3, prune_interval=float("inf"))
+    for i in range(5):
+        cache.set(f"key{i}", i)
+        os.utime(cache._path(f"key{i}"), (1000 + i, 1000 + i))
+
+    assert cache.prune() == 2
+    assert [cache.get(f"key{i}")[0] for i in range(5)] == [False, False, True, True, True]
+
+    cache.max_entries, cache.max_bytes = None, os.path.getsize(cache._path("key4")) * 2
+    assert cache.prune() == 1
+    assert cache.get("key2") == (False, None)
+
+
+def test_expired_entries_are_deleted(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=60, prune_interval=float("inf"))
+    cache.set("old", 1)
+    cache.set("new", 2)
+    old = time.time() - 120
+    os.utime(cache._path("old"), (old, old))
+
+    assert cache.prune() == 1
+    assert not os.path.exists(cache._path("old"))
+    assert cache.get("new") == (True, 2)
+
+    os.utime(cache._path("new"), (old, old))
+    assert cache.get("new") == (False, None)
+    assert not os.path.exists(cache._path("new"))
+
+
+def test_writes_prune_and_locks_are_bounded(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=10, prune_interval=0)
+    for i in range(200):
+        value, computed = cache.get_or_compute(f"key{i}", lambda: i)
+        assert computed and value == i
+
+    assert len(cache_files(tmp_path, ".pkl")) == 10
+    assert len(cache_files(tmp_path, ".lock")) <= LOCK_STRIPES + 1
@@ -0,0 +1,83 @@
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from mushroom_training import BackgroundTrainer, model_key
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH = os.path.join(ROOT, "data", "mushrooms.csv")
+COLS = ['class', 'odor', 'gill-size']
+# A key no saved artifact matches, so get() always has to train
+PARAMS = {"max_depth": 1, "random_state": 12345, "n_estimators": 5}
+
+
+@pytest.fixture
+def trainer():
+    trainer = BackgroundTrainer()
+    yield trainer
+    trainer.shutdown()
+
+
+def wait_idle(trainer, timeout=60):
+    deadline = time.monotonic() + timeout
+    while trainer.is_training() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not trainer.is_training()
+
+
+def expire_backoff(trainer):
+    key = model_key(PATH, COLS, PARAMS)
+    error, failed_at, failures = trainer.errors[key]
+    trainer.errors[key] = (error, failed_at - 3600, failures)
+
+
+def break_pool(trainer):
+    with pytest.raises(BrokenProcessPool):
+        trainer._executor.submit(os._exit, 1).result(timeout=60)
+
+
+def test_broken_pool_is_a_failure_with_backoff_then_replaced(trainer):
+    break_pool(trainer)
+
+    _, _, is_current = trainer.get(PATH, COLS, PARAMS)
+    assert not is_current
+    error, retry_in = trainer.failure(PATH, COLS, PARAMS)
+    assert isinstance(error, BrokenProcessPool)
+    assert retry_in > 0
+
+    # Still backing off: nothing submitted
+    trainer.get(PATH, COLS, PARAMS)
+    assert not trainer.is_training()
+
+    expire_backoff(trainer)
+    trainer.get(PATH, COLS, PARAMS)
+    assert trainer.is_training()
+
+
+def test_worker_killed_mid_fit_is_recorded_and_pool_replaced(trainer):
+    trainer.get(PATH, COLS, PARAMS)
+    assert trainer.is_training()
+    for process in list(trainer._executor._processes.values()):
+        process.kill()
+    wait_idle(trainer)
+
+    key = model_key(PATH, COLS, PARAMS)
+    error, _, failures = trainer.errors[key]
+    assert isinstance(error, BrokenProcessPool)
+    assert failures == 1
+
+    broken = trainer._executor
+    expire_backoff(trainer)
+    trainer.get(PATH, COLS, PARAMS)
+    assert trainer._executor is not broken
+    assert trainer.is_training()
+
+
+def test_cancelled_jobs_are_not_failures(trainer):
+    trainer._executor.submit(time.sleep, 5)
+    trainer.get(PATH, COLS, PARAMS)
+    trainer.shutdown()
+    wait_idle(trainer)
+    assert trainer.errors == {}
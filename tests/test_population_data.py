@@ -0,0 +1,213 @@
+import os
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from population_data import PopulationLoader
+
+LOCAL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "data", "quarterly_canada_population.csv")
+ETAG = '"v2"'
+LAST_MODIFIED = "Wed, 01 Oct 2025 00:00:00 GMT"
+
+
+# Stand-in for the dataset host: serves server.body with an ETag and
+# Last-Modified (whichever server.validators lists), answers matching
+# conditional requests with 304, or fails with server.status
+class DatasetHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        if ("etag" in server.validators and self.headers.get("If-None-Match") == ETAG) or \
+                ("last_modified" in server.validators and self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(server.body)))
+        if "etag" in server.validators:
+            self.send_header("ETag", ETAG)
+        if "last_modified" in server.validators:
+            self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_body():
+    with open(LOCAL_PATH, "rb") as file:
+        return file.read()
+
+
+# The newer remote copy: the local one minus its last quarter
+@pytest.fixture
+def remote_body(local_body):
+    return local_body.rstrip(b"\r\n").rsplit(b"\n", 1)[0] + b"\n"
+
+
+@pytest.fixture
+def server(remote_body):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), DatasetHandler)
+    httpd.status = 200
+    httpd.body = remote_body
+    httpd.validators = ("etag", "last_modified")
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def make_loader(server, tmp_path):
+    def make(url=None, max_age=3600):
+        return PopulationLoader(url=url or f"http://127.0.0.1:{server.server_port}/population.csv",
+                                local_path=LOCAL_PATH, cache_path=str(tmp_path / "population.csv"),
+                                max_age=max_age, timeout=5)
+    return make
+
+
+# Serves the local copy, then waits for the background refresh it started
+def initial_snapshot(loader):
+    snapshot = loader.snapshot()
+    if loader._refresh_thread is not None:
+        loader._refresh_thread.join()
+    return snapshot
+
+
+def n_rows(body):
+    return body.rstrip(b"\r\n").count(b"\n")
+
+
+def unreachable_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/population.csv"
+
+
+def test_refresh_swaps_in_and_caches_new_data(make_loader, remote_body):
+    loader = make_loader()
+    assert loader.refresh()
+    assert loader.source == "remote"
+    assert loader.last_error is None
+    assert not loader.is_stale()
+    assert len(loader.get()) == n_rows(remote_body)
+
+    # A new process starts from the cached copy, already fresh
+    restarted = make_loader()
+    assert len(restarted.snapshot().df) == len(loader.get())
+    assert restarted.source == "cache"
+    assert not restarted.is_stale()
+
+
+def test_stale_snapshot_is_revalidated_in_the_background(make_loader, local_body, remote_body):
+    loader = make_loader()
+    snapshot = loader.snapshot()
+    assert len(snapshot.df) == n_rows(local_body)
+
+    loader._refresh_thread.join()
+    assert loader.source == "remote"
+    assert len(loader.get()) == n_rows(remote_body)
+    assert loader.snapshot() is not snapshot
+    assert loader.snapshot().version == snapshot.version + 1
+
+
+@pytest.mark.parametrize("validators, header", [
+    (("etag",), "If-None-Match"),
+    (("last_modified",), "If-Modified-Since"),
+])
+def test_not_modified_keeps_snapshot(make_loader, server, validators, header):
+    server.validators = validators
+    loader = make_loader()
+    assert loader.refresh()
+    snapshot, version = loader.snapshot(), loader.version
+
+    loader.checked_at = 0.0
+    assert not loader.refresh()
+    assert header in server.requests[-1]
+    assert loader.snapshot() is snapshot
+    assert loader.version == version
+    assert loader.last_error is None
+    assert not loader.is_stale()
+
+
+@pytest.mark.parametrize("failure", ["server_error", "unreachable"])
+def test_failed_refresh_keeps_serving_and_backs_off(make_loader, server, failure):
+    server.status = 503
+    loader = make_loader(url=unreachable_url() if failure == "unreachable" else None)
+    snapshot = initial_snapshot(loader)
+
+    assert loader.source == "local"
+    assert loader.last_error is not None
+    assert loader.snapshot() is snapshot
+    assert not loader.is_stale()
+    assert not os.path.exists(loader.cache_path)
+
+
+def test_malformed_body_leaves_cache_and_snapshot_alone(make_loader, server, remote_body):
+    loader = make_loader()
+    assert loader.refresh()
+    snapshot, version = loader.snapshot(), loader.version
+
+    server.body = b"garbage,\n1,2,3\n"
+    loader.checked_at = 0.0
+    loader._meta = {}
+    assert not loader.refresh()
+    assert isinstance(loader.last_error, (ValueError, KeyError))
+    assert loader.snapshot() is snapshot
+    assert loader.version == version
+    assert not loader.is_stale()
+    with open(loader.cache_path, "rb") as file:
+        assert file.read() == remote_body
+
+    # A restart still loads
+    assert len(make_loader().snapshot().df) == len(snapshot.df)
+
+
+def test_malformed_first_download_is_not_cached(make_loader, server):
+    server.body = b"garbage,\n1,2,3\n"
+    loader = make_loader()
+    initial_snapshot(loader)
+    assert loader.source == "local"
+    assert loader.last_error is not None
+    assert not os.path.exists(loader.cache_path)
+
+
+def test_unreadable_cache_falls_back_to_local_copy(make_loader, server, local_body):
+    server.status = 503
+    loader = make_loader()
+    with open(loader.cache_path, "wb") as file:
+        file.write(b"garbage,\n1,2,3\n")
+
+    snapshot = initial_snapshot(loader)
+    assert loader.source == "local"
+    assert len(snapshot.df) == n_rows(local_body)
+
+
+def test_refresh_before_first_snapshot_revalidates_cache(make_loader, server):
+    assert make_loader().refresh()
+
+    # A new process (e.g. warmup.py) refreshing without loading first
+    assert not make_loader().refresh()
+    assert server.requests[-1].get("If-None-Match") == ETAG
+
+
+def test_concurrent_refreshes_both_write_the_cache(make_loader, remote_body):
+    loader = make_loader()
+    loader.snapshot()
+    assert loader.refresh()
+    loader._refresh_thread.join()
+    assert loader.last_error is None
+    with open(loader.cache_path, "rb") as file:
+        assert file.read() == remote_body
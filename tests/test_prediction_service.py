@@ -0,0 +1,38 @@
+import threading
+
+import numpy as np
+
+from prediction_service import PredictionService
+
+
+def predict(X):
+    return np.asarray(X).sum(axis=1)
+
+
+def test_rows_are_batched():
+    service = PredictionService(predict, max_batch_size=64, max_wait_ms=20)
+    futures = [service.submit([i, 1]) for i in range(50)]
+    assert [future.result(5) for future in futures] == [i + 1 for i in range(50)]
+
+    stats = service.stats()
+    assert stats["requests"] == 50
+    assert stats["batches"] < 50
+    assert 1 <= stats["max_queue_depth"] <= 50
+    assert stats["direct_requests"] == 0
+
+
+def test_predict_row_skips_the_queue():
+    calls = []
+
+    def predict_row(row):
+        calls.append(threading.current_thread())
+        return sum(row)
+
+    # A wait no queued request could sit through within the timeout
+    service = PredictionService(predict, max_wait_ms=60_000, predict_row=predict_row)
+    assert [service.predict_one([i, 2], timeout=1) for i in range(10)] == [i + 2 for i in range(10)]
+    assert calls == [threading.current_thread()] * 10
+
+    stats = service.stats()
+    assert stats["direct_requests"] == 10
+    assert stats["requests"] == 0 and stats["max_queue_depth"] == 0
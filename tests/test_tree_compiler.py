@@ -0,0 +1,94 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import load
+
+from model_artifacts import file_sha256
+from tree_compiler import PIPE_PATH, CompiledPipeline, compile_pipeline, load_or_compile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+
+
+@pytest.fixture(scope="module")
+def pipe():
+    return load(os.path.join(ROOT, PIPE_PATH))
+
+
+@pytest.fixture(scope="module")
+def compiled(pipe):
+    return compile_pipeline(pipe)
+
+
+def training_rows(compiled):
+    return pd.read_csv(os.path.join(ROOT, "data", "mushrooms.csv"))[compiled.feature_names].to_numpy().astype(str)
+
+
+def random_rows(compiled, n_rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.choice(cats, n_rows) for cats in compiled.categories_])
+
+
+def assert_matches_pipeline(pipe, compiled, X):
+    expected = pipe.predict(X)
+    assert (compiled.predict(X) == expected).all()
+    # Under 64 rows predict skips the dedup path
+    assert (compiled.predict(X[:50]) == expected[:50]).all()
+    assert [compiled.predict_one(row) for row in X[:2000]] == expected[:2000].tolist()
+
+
+def test_matches_pipeline_on_training_rows(pipe, compiled):
+    assert_matches_pipeline(pipe, compiled, training_rows(compiled))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_pipeline_on_random_category_rows(pipe, compiled, seed):
+    assert_matches_pipeline(pipe, compiled, random_rows(compiled, seed=seed))
+
+
+def test_unknown_category_raises(compiled):
+    row = training_rows(compiled)[0].astype(object)
+    row[0] = "not-a-category"
+    with pytest.raises(ValueError):
+        compiled.predict(row.reshape(1, -1))
+    with pytest.raises(ValueError):
+        compiled.predict_one(row)
+
+
+def test_save_load_round_trip(pipe, tmp_path):
+    compiled = compile_pipeline(pipe, source_sha="abc123")
+    path = compiled.save(str(tmp_path / "pipe.compiled.npz"))
+    loaded = CompiledPipeline.load(path)
+
+    assert loaded.source_sha == "abc123"
+    assert loaded.feature_names == compiled.feature_names
+    assert loaded.max_depth == compiled.max_depth
+    X = random_rows(compiled, seed=3)
+    assert (loaded.predict(X) == compiled.predict(X)).all()
+    assert (loaded.decision_function(loaded.encode(X)) == compiled.decision_function(compiled.encode(X))).all()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp.npz")]
+
+
+def test_load_or_compile_recompiles_when_source_changes(pipe, tmp_path):
+    pipe_path = str(tmp_path / "pipe.joblib")
+    compiled_path = str(tmp_path / "pipe.compiled.npz")
+    shutil.copyfile(os.path.join(ROOT, PIPE_PATH), pipe_path)
+
+    stale = compile_pipeline(pipe, source_sha="built-from-an-older-pipe")
+    stale.value = np.zeros_like(stale.value)
+    stale.save(compiled_path)
+
+    compiled = load_or_compile(pipe_path, compiled_path)
+    assert compiled.source_sha == file_sha256(pipe_path)
+    assert CompiledPipeline.load(compiled_path).source_sha == compiled.source_sha
+    X = random_rows(compiled, n_rows=2000, seed=4)
+    assert (compiled.predict(X) == pipe.predict(X)).all()
+
+    # Up to date now: loaded as saved, not rebuilt
+    mtime = os.stat(compiled_path).st_mtime_ns
+    assert load_or_compile(pipe_path, compiled_path).source_sha == compiled.source_sha
+    assert os.stat(compiled_path).st_mtime_ns == mtime
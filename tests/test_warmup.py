@@ -0,0 +1,60 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from warmup import STEPS, make_readiness_server, steps_for_app, warm_up, write_status
+
+
+def test_only_the_apps_steps_are_required():
+    required = {name for name, _, required in steps_for_app("First_Project_Stats_Canada.py") if required}
+    assert required == set()
+    required = {name for name, _, required in steps_for_app("model_gboost_app.py") if required}
+    assert required == {"compiled_model", "prediction_table"}
+    # Every step still runs
+    assert len(steps_for_app("ClassificationGboost.py")) == len(STEPS)
+
+
+def fail():
+    raise ImportError("No module named 'sklearn'")
+
+
+def test_failed_optional_step_still_ready(tmp_path):
+    path = str(tmp_path / "warmup.json")
+    steps = [("mushroom_model", fail, True), ("population_data", lambda: None, False)]
+    assert not write_status(warm_up(steps), path)["ready"]
+
+    steps = steps_for_app("First_Project_Stats_Canada.py", steps)
+    assert write_status(warm_up(steps), path)["ready"]
+
+
+@pytest.fixture
+def readiness(tmp_path):
+    path = str(tmp_path / "warmup.json")
+    server = make_readiness_server(0, host="127.0.0.1", status_path=path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield path, f"http://127.0.0.1:{server.server_port}/ready"
+    server.shutdown()
+    server.server_close()
+
+
+def get_status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_readiness_endpoint_follows_status_file(readiness):
+    path, url = readiness
+    assert get_status(url) == (503, {"ready": False})
+
+    write_status([{"step": "mushroom_model", "ok": False, "required": True, "seconds": 0.0, "error": "x"}], path)
+    assert get_status(url)[0] == 503
+
+    write_status([{"step": "population_data", "ok": False, "required": False, "seconds": 0.0, "error": "x"}], path)
+    code, status = get_status(url)
+    assert code == 200 and status["ready"]
@@ -0,0 +1,274 @@
+import os
+
+import numpy as np
+
+from model_artifacts import file_sha256
+
+# =====================
+# 🌲 Compiled Tree Ensemble
+# =====================
+# Flattens the fitted OrdinalEncoder + GradientBoostingClassifier pipeline
+# from model/gboost_pipe.joblib into contiguous NumPy arrays:
+#   - per feature: sorted category strings (code = position in the array)
+#   - per node, all trees concatenated: feature, threshold, left, right, value
+# and evaluates them with plain NumPy, so predicting needs neither sklearn
+# nor the Pipeline machinery. Because every input is a small category code,
+# each node's split is expanded into a transition table
+# next_node[node * K + code], so one tree step is two array gathers and no
+# float comparison. Leaves point to themselves, so every row can take
+# exactly max_depth steps without branching on "is this a leaf".
+PIPE_PATH = "model/gboost_pipe.joblib"
+COMPILED_PATH = "model/gboost_pipe.compiled.npz"
+
+
+# Strings (n_rows, n_features) -> integer codes (position in each sorted
+# category array); unknown categories raise, like
+# OrdinalEncoder(handle_unknown="error")
+def encode_categories(X, categories):
+    X = np.asarray(X).astype(str)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    codes = np.empty(X.shape, dtype=np.intp)
+    for j, cats in enumerate(categories):
+        column = X[:, j]
+        positions = np.searchsorted(cats, column)
+        positions = np.minimum(positions, cats.size - 1)
+        unknown = cats[positions] != column
+        if unknown.any():
+            raise ValueError(f"Found unknown categories {sorted(set(column[unknown]))} "
+                             f"in column {j} during transform")
+        codes[:, j] = positions
+    return codes
+
+
+class CompiledPipeline:
+    def __init__(self, feature_names, categories, classes, feature, threshold,
+                 left, right, value, roots, init_raw, learning_rate, max_depth, source_sha=""):
+        self.feature_names = [str(name) for name in feature_names]
+        # Same attribute name as the sklearn encoder, so code written against
+        # encoder.categories_ (e.g. batch validation) works with either
+        self.categories_ = [np.asarray(cats).astype(str) for cats in categories]
+        self.classes_ = np.asarray(classes).astype(str)
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.init_raw = float(init_raw)
+        self.learning_rate = float(learning_rate)
+        self.max_depth = int(max_depth)
+        self.source_sha = str(source_sha)
+
+        # Transition table over codes 0..K-1 (K = largest category count)
+        self.n_codes = max(cats.size for cats in self.categories_)
+        codes = np.arange(self.n_codes)
+        self.next_node = np.where(codes[None, :] <= self.threshold[:, None],
+                                  self.left[:, None], self.right[:, None]).ravel().astype(np.int32)
+        self._feature32 = self.feature.astype(np.int32)
+        self._roots32 = self.roots.astype(np.int32)
+        # Mixed-radix weights turning a code row into one integer, for dedup
+        sizes = [cats.size for cats in self.categories_]
+        self.radix = np.cumprod([1] + sizes[:0:-1])[::-1].astype(np.int64)
+
+        # Scalar path: category -> code dicts and plain Python lists
+        self._codes = [{cat: i for i, cat in enumerate(cats)} for cats in self.categories_]
+        is_leaf = self.left == np.arange(self.left.size)
+        self._feature = np.where(is_leaf, -1, self.feature).tolist()
+        self._next = self.next_node.tolist()
+        self._values = self.value.tolist()
+        self._roots = self.roots.tolist()
+
+    def __sizeof__(self):
+        arrays = (self.feature, self.threshold, self.left, self.right, self.value,
+                  self.roots, self.next_node, self._feature32, self._roots32)
+        return object.__sizeof__(self) + sum(array.nbytes for array in arrays)
+
+    # ---------- encoding ----------
+    def encode(self, X):
+        return encode_categories(X, self.categories_)
+
+    # ---------- evaluation ----------
+    # Raw log-odds for integer code rows (n_rows, n_features). Rows go through
+    # in blocks so the (rows x trees) node matrix stays cache-sized.
+    def decision_function(self, codes, block_size=1024):
+        codes = np.asarray(codes, dtype=np.int32)
+        n_rows, n_features = codes.shape
+        raw = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, block_size):
+            block = codes[start:start + block_size]
+            flat = block.ravel()
+            row_offsets = (np.arange(block.shape[0], dtype=np.int32) * n_features)[:, None]
+            nodes = np.broadcast_to(self._roots32, (block.shape[0], self._roots32.size))
+            for _ in range(self.max_depth):
+                step = flat[row_offsets + self._feature32[nodes]]
+                nodes = self.next_node[nodes * self.n_codes + step]
+            raw[start:start + block_size] = self.value[nodes].sum(axis=1)
+        return self.init_raw + self.learning_rate * raw
+
+    def predict(self, X):
+        codes = self.encode(X)
+        # Real batches repeat the same specimens a lot: score each distinct
+        # code row once and scatter the result back
+        if codes.shape[0] > 64:
+            _, first, inverse = np.unique(codes @ self.radix, return_index=True, return_inverse=True)
+            raw = self.decision_function(codes[first])[inverse.ravel()]
+        else:
+            raw = self.decision_function(codes)
+        return self.classes_[(raw > 0).astype(np.intp)]
+
+    # One specimen as a sequence of category codes, in pure Python
+    def predict_one(self, values):
+        raw = 0.0
+        codes = []
+        for j, value in enumerate(values):
+            code = self._codes[j].get(value)
+            if code is None:
+                raise ValueError(f"Found unknown categories ['{value}'] in column {j} during transform")
+            codes.append(code)
+
+        feature, next_node, n_codes, values = self._feature, self._next, self.n_codes, self._values
+        for node in self._roots:
+            f = feature[node]
+            while f >= 0:
+                node = next_node[node * n_codes + codes[f]]
+                f = feature[node]
+            raw += values[node]
+        raw = self.init_raw + self.learning_rate * raw
+        return self.classes_[int(raw > 0)]
+
+    # ---------- persistence ----------
+    def save(self, path=COMPILED_PATH):
+        arrays = {f"categories_{j}": cats for j, cats in enumerate(self.categories_)}
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            feature_names=np.asarray(self.feature_names),
+            classes=self.classes_,
+            feature=self.feature, threshold=self.threshold,
+            left=self.left, right=self.right, value=self.value, roots=self.roots,
+            scalars=np.array([self.init_raw, self.learning_rate, self.max_depth]),
+            source_sha=np.asarray(self.source_sha),
+            **arrays,
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=COMPILED_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            feature_names = data["feature_names"]
+            init_raw, learning_rate, max_depth = data["scalars"]
+            return cls(
+                feature_names=feature_names,
+                categories=[data[f"categories_{j}"] for j in range(len(feature_names))],
+                classes=data["classes"],
+                feature=data["feature"], threshold=data["threshold"],
+                left=data["left"], right=data["right"], value=data["value"], roots=data["roots"],
+                init_raw=init_raw, learning_rate=learning_rate, max_depth=max_depth,
+                source_sha=data["source_sha"].item(),
+            )
+
+
+# =====================
+# 🛠️ Compiler
+# =====================
+def compile_pipeline(pipe, source_sha=""):
+    encoder = pipe.named_steps["encoder"]
+    gbc = pipe.named_steps["gbc"]
+    if len(gbc.classes_) != 2:
+        raise ValueError("Only binary GradientBoostingClassifier pipelines can be compiled")
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in gbc.estimators_[:, 0]:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        value.append(tree.value[:, 0, 0])
+        max_depth = max(max_depth, tree.max_depth)
+        offset += tree.node_count
+
+    # Raw score of the init estimator (log-odds of the class prior)
+    init_raw = gbc._raw_predict_init(np.zeros((1, gbc.n_features_in_), dtype=np.float32))[0, 0]
+
+    return CompiledPipeline(
+        feature_names=encoder.feature_names_in_,
+        categories=encoder.categories_,
+        classes=gbc.classes_,
+        feature=np.concatenate(feature), threshold=np.concatenate(threshold),
+        left=np.concatenate(left), right=np.concatenate(right),
+        value=np.concatenate(value), roots=roots,
+        init_raw=init_raw, learning_rate=gbc.learning_rate, max_depth=max_depth,
+        source_sha=source_sha,
+    )
+
+
+# Loads the compiled model, recompiling (which needs sklearn) only when it is
+# missing or was built from a different joblib file
+def load_or_compile(pipe_path=PIPE_PATH, compiled_path=COMPILED_PATH):
+    source_sha = file_sha256(pipe_path)
+    if os.path.exists(compiled_path):
+        compiled = CompiledPipeline.load(compiled_path)
+        if compiled.source_sha == source_sha:
+            return compiled
+
+    from joblib import load
+
+    compiled = compile_pipeline(load(pipe_path), source_sha)
+    compiled.save(compiled_path)
+    return compiled
+
+
+# =====================
+# ✅ Build, Parity Check & Benchmark
+# =====================
+# python tree_compiler.py
+if __name__ == "__main__":
+    import time
+    import warnings
+
+    import pandas as pd
+    from joblib import load
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    pipe = load(PIPE_PATH)
+    compiled = compile_pipeline(pipe, file_sha256(PIPE_PATH))
+    compiled.save(COMPILED_PATH)
+    compiled = CompiledPipeline.load(COMPILED_PATH)
+    print(f"Compiled {len(compiled.roots)} trees / {compiled.value.size} nodes -> {COMPILED_PATH}")
+
+    # Parity on the training data plus random combinations of known categories
+    X = pd.read_csv("data/mushrooms.csv")[compiled.feature_names].to_numpy().astype(str)
+    rng = np.random.default_rng(0)
+    X_random = np.column_stack([rng.choice(cats, 100_000) for cats in compiled.categories_])
+    for name, sample in (("training rows", X), ("random rows", X_random)):
+        expected = pipe.predict(sample)
+        mismatches = int((compiled.predict(sample) != expected).sum())
+        scalar = int(sum(compiled.predict_one(row) != label for row, label in zip(sample[:2000], expected)))
+        print(f"{name}: {len(sample):,} batch mismatches={mismatches}, 2,000 scalar mismatches={scalar}")
+        if mismatches or scalar:
+            raise SystemExit("Compiled model does not match the pipeline")
+
+    def bench(label, fn, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        print(f"{label:<28} {(time.perf_counter() - started) / repeat * 1e6:10.1f} µs")
+
+    row = X[0]
+    bench("pipeline single row", lambda: pipe.predict(row.reshape(1, -1)), 200)
+    bench("compiled predict_one", lambda: compiled.predict_one(row), 20_000)
+    bench("compiled predict (1 row)", lambda: compiled.predict(row.reshape(1, -1)), 2_000)
+    bench("pipeline 8,124 rows", lambda: pipe.predict(X), 5)
+    bench("compiled 8,124 rows", lambda: compiled.predict(X), 5)
+    bench("pipeline 100,000 random rows", lambda: pipe.predict(X_random), 2)
+    bench("compiled 100,000 random rows", lambda: compiled.predict(X_random), 2)
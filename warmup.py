@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =====================
+# 🔥 Cache Warm-Up
+# =====================
+# Run before the server takes traffic, so the first visitor after a deploy
+# does not pay for training, compiling or downloading:
+#
+#   python warmup.py --parallel --app First_Project_Stats_Canada.py && streamlit run First_Project_Stats_Canada.py
+#
+# (as .devcontainer/devcontainer.json does: the server only starts once
+# every required step has succeeded). With --app, only the steps that app
+# needs are required; the others still run but may fail, so e.g. the
+# population dashboard does not wait on scikit-learn.
+#
+# Each step calls the same loaders the apps use, which persist what they
+# build (model/artifacts, the compiled model, .cache/ population copy), so
+# the app's cached loaders find it on disk instead of rebuilding it. A
+# status file is written when warm-up finishes; `python warmup.py --check`
+# exits 0 only once every required step has succeeded, and
+# `python warmup.py --serve-ready 8502` answers GET /ready with 200 (or 503
+# until then), for the deploy's readiness probe.
+STATUS_PATH = os.path.join(".cache", "warmup.json")
+
+
+# Mushroom model for ClassificationGboost.py: load or train the artifact
+# (under the cross-process training lock, so replicas share one fit)
+def warm_mushroom_model():
+    from ClassificationGboost import COLS, GBC_PARAMS, path
+    from mushroom_training import model_key, train_bundle
+
+    train_bundle(model_key(path, COLS, GBC_PARAMS), path, list(COLS), GBC_PARAMS)
+
+
+# Compiled evaluator for model_gboost_app.py (compiles on a model change)
+def warm_compiled_model():
+    from tree_compiler import load_or_compile
+
+    load_or_compile()
+
+
+# Bit-packed lookup table for model_gboost_app.py: read every page once so
+# the memory map starts out in the OS page cache
+def warm_prediction_table():
+    from prediction_table import PredictionTable
+
+    table = PredictionTable.load()
+    if table is not None:
+        int(table.bits[::4096].sum())
+
+
+# Population dataset for First_Project_Stats_Canada.py: revalidate against
+# the URL and refresh the on-disk copy. Only refresh() is called: snapshot()
+# would start a second, background refresh of its own. Optional: the app
+# still starts from the local CSV when the network is down.
+def warm_population_data():
+    from population_data import PopulationLoader
+
+    loader = PopulationLoader()
+    loader.refresh()
+    if loader.last_error:
+        raise RuntimeError(loader.last_error)
+
+
+# (name, function, required)
+STEPS = [
+    ("mushroom_model", warm_mushroom_model, True),
+    ("compiled_model", warm_compiled_model, True),
+    ("prediction_table", warm_prediction_table, True),
+    ("population_data", warm_population_data, False),
+]
+
+# Steps each entry script needs; with --app, the rest become optional
+APP_STEPS = {
+    "First_Project_Stats_Canada.py": [],
+    "ClassificationGboost.py": ["mushroom_model"],
+    "model_gboost_app.py": ["compiled_model", "prediction_table"],
+}
+
+
+def steps_for_app(app, steps=STEPS):
+    needed = APP_STEPS[os.path.basename(app)]
+    return [(name, func, required and name in needed) for name, func, required in steps]
+
+
+def run_step(name, func, required):
+    started = time.perf_counter()
+    try:
+        func()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"step": name, "ok": error is None, "required": required,
+            "seconds": time.perf_counter() - started, "error": error}
+
+
+def warm_up(steps=STEPS, parallel=False):
+    if parallel:
+        with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+            results = list(executor.map(lambda step: run_step(*step), steps))
+    else:
+        results = [run_step(*step) for step in steps]
+    return results
+
+
+def write_status(results, path=STATUS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    status = {
+        "ready": all(r["ok"] for r in results if r["required"]),
+        "finished_at": time.time(),
+        "steps": results,
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(status, file, indent=2)
+    os.replace(tmp_path, path)
+    return status
+
+
+def read_status(path=STATUS_PATH):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def is_ready(path=STATUS_PATH):
+    status = read_status(path)
+    return bool(status and status.get("ready"))
+
+
+# Readiness endpoint: GET /ready is 200 with the status file once warm-up
+# has succeeded, 503 before that (or after a failed warm-up)
+class ReadinessHandler(BaseHTTPRequestHandler):
+    status_path = STATUS_PATH
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/ready":
+            self.send_error(404)
+            return
+        status = read_status(self.status_path)
+        body = json.dumps(status or {"ready": False}).encode()
+        self.send_response(200 if status and status.get("ready") else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_readiness_server(port, host="0.0.0.0", status_path=STATUS_PATH):
+    handler = type("Handler", (ReadinessHandler,), {"status_path": status_path})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-warm the apps' caches before serving traffic")
+    parser.add_argument("--parallel", action="store_true", help="run the steps concurrently")
+    parser.add_argument("--check", action="store_true", help="health check: exit 0 only if warm-up has completed")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _, _ in STEPS], help="run only these steps")
+    parser.add_argument("--app", choices=list(APP_STEPS), help="require only the steps this entry script needs")
+    parser.add_argument("--serve-ready", type=int, metavar="PORT",
+                        help="serve the readiness endpoint GET /ready on PORT (does not warm up)")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if is_ready() else 1)
+    if args.serve_ready:
+        make_readiness_server(args.serve_ready).serve_forever()
+
+    # A previous deploy's status must not pass the health check while we run
+    try:
+        os.remove(STATUS_PATH)
+    except OSError:
+        pass
+
+    steps = steps_for_app(args.app) if args.app else STEPS
+    steps = [step for step in steps if not args.only or step[0] in args.only]
+    started = time.perf_counter()
+    results = warm_up(steps, parallel=args.parallel)
+    status = write_status(results)
+
+    print(f"{'step':<18} {'seconds':>8}  status")
+    for r in results:
+        label = "ok" if r["ok"] else ("FAILED" if r["required"] else "skipped") + f" ({r['error']})"
+        print(f"{r['step']:<18} {r['seconds']:8.2f}  {label}")
+    print(f"{'total':<18} {time.perf_counter() - started:8.2f}  {'ready' if status['ready'] else 'NOT READY'}")
+    sys.exit(0 if status["ready"] else 1)